@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+In-process load test of the API routes: latency percentiles and throughput
+per route under concurrent clients, as JSON.
+
+    python benchmarks/load_test.py [--requests 2000] [--concurrency 32] [--events 5000]
+                                   [--engine memory|sqlite] [--routes month current_date ...]
+                                   [--output results.json]
+
+The FastAPI app from server.py is driven over ASGI with httpx, so there is
+no network or server process in the measurement; a local engine (memory by
+default, or a throwaway SQLite file) stands in for MongoDB. Numbers are for
+comparing commits on the same machine, not absolute capacity. Each route
+runs on its own: ``--concurrency`` workers issue ``--requests`` requests
+between them, after a short warm-up.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+YEAR = 2025
+WARMUP_REQUESTS = 50
+
+# A route scenario issues its i-th request with the client and returns the response
+Scenario = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def seed(service, events: int, rng: random.Random) -> List[str]:
+    """Store ``events`` events spread over the test year; return their ids."""
+    from models import CurrentDateCreate, Event
+
+    await service.set_current_date(CurrentDateCreate(year=YEAR, month=2, day=15))
+    docs = [
+        Event(
+            year=YEAR, month=rng.randrange(10), day=rng.randrange(1, 31),
+            note=f"Load test event {index}", type=rng.choice(["event", "special", "deadline"])
+        ).dict()
+        for index in range(events)
+    ]
+    for doc in docs:
+        doc["changed_at"] = doc["updated_at"]
+    for start in range(0, len(docs), 500):
+        await service.storage.insert_many(docs[start:start + 500])
+    service._invalidate_all_months()
+    return [doc["id"] for doc in docs]
+
+
+def build_scenarios(event_ids: List[str], deletable: List[str], rng: random.Random) -> Dict[str, Scenario]:
+    month_etags: Dict[int, str] = {}
+
+    async def month(client, i):
+        return await client.get(f"/api/events/{YEAR}/{rng.randrange(10)}")
+
+    async def month_revalidate(client, i):
+        month = rng.randrange(10)
+        headers = {"If-None-Match": month_etags[month]} if month in month_etags else {}
+        response = await client.get(f"/api/events/{YEAR}/{month}", headers=headers)
+        if "etag" in response.headers:
+            month_etags[month] = response.headers["etag"]
+        return response
+
+    async def current_date(client, i):
+        return await client.get("/api/calendar/current-date")
+
+    async def range_(client, i):
+        month = rng.randrange(9)
+        return await client.get("/api/events/range", params={"from": f"{YEAR}-{month}-1", "to": f"{YEAR}-{month + 1}-30"})
+
+    async def create(client, i):
+        return await client.post("/api/events", json={
+            "year": YEAR, "month": rng.randrange(10), "day": rng.randrange(1, 31), "note": f"Created {i}"
+        })
+
+    async def update(client, i):
+        return await client.put(f"/api/events/{rng.choice(event_ids)}", json={"note": f"Updated {i}"})
+
+    async def delete(client, i):
+        return await client.delete(f"/api/events/{deletable.pop()}")
+
+    return {
+        "month": month,
+        "month_revalidate": month_revalidate,
+        "current_date": current_date,
+        "range": range_,
+        "create": create,
+        "update": update,
+        "delete": delete,
+    }
+
+
+async def run_route(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    issued = 0
+
+    async def worker():
+        nonlocal errors, issued
+        while issued < requests:
+            index = issued
+            issued += 1
+            start = time.perf_counter()
+            response = await scenario(client, index)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(sum(ms) / len(ms), 3),
+        "p50_ms": round(percentile(ms, 0.50), 3),
+        "p95_ms": round(percentile(ms, 0.95), 3),
+        "p99_ms": round(percentile(ms, 0.99), 3),
+        "max_ms": round(ms[-1], 3),
+    }
+
+
+async def run(args) -> Dict:
+    # Imported late so STORAGE_ENGINE is set before the app builds its engine
+    import server
+
+    # One log line per request would dominate the measurement
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    rng = random.Random(args.seed)
+    await server.storage.initialize()
+    try:
+        event_ids = await seed(server.calendar_service, args.events, rng)
+        # Events for the delete route, so it never runs out of ids to delete
+        deletable = await seed(server.calendar_service, args.requests + WARMUP_REQUESTS, rng)
+        scenarios = build_scenarios(event_ids, deletable, rng)
+
+        transport = httpx.ASGITransport(app=server.app)
+        results = {}
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test") as client:
+            for name in args.routes:
+                await run_route(client, scenarios[name], WARMUP_REQUESTS, args.concurrency)
+                results[name] = await run_route(client, scenarios[name], args.requests, args.concurrency)
+    finally:
+        await server.storage.close()
+
+    return {
+        "config": {
+            "engine": server.storage.name,
+            "events": args.events,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "python": platform.python_version(),
+        },
+        "routes": results,
+    }
+
+
+def main() -> int:
+    routes = ["month", "month_revalidate", "current_date", "range", "create", "update", "delete"]
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per route")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients per route")
+    parser.add_argument("--events", type=int, default=5000, help="Events stored before the run")
+    parser.add_argument("--engine", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--routes", nargs="+", choices=routes, default=routes)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    args = parser.parse_args()
+
+    os.environ["STORAGE_ENGINE"] = args.engine
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["SQLITE_PATH"] = os.path.join(directory, "load_test.db")
+        results = asyncio.run(run(args))
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    return 1 if any(route["errors"] for route in results["routes"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
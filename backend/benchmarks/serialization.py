@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Per-event serialization cost of the month endpoint, before and after the
+lean response path, on a 1,000-event month.
+
+    python benchmarks/serialization.py [--events 1000] [--rounds 50]
+
+"before" replays the old path: Event(**doc) per document, EventResponse(**event.dict())
+per event, then FastAPI's response_model validation and json.dumps.
+"after" is the current path: one TypeAdapter validation of the whole list and
+orjson serialization of a single list dump.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import orjson
+from pydantic import TypeAdapter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models import Event, EventList, EventResponse  # noqa: E402
+
+EventResponseList = TypeAdapter(List[EventResponse])
+
+
+def make_docs(count: int) -> List[dict]:
+    return [
+        Event(year=2025, month=3, day=index % 30 + 1, note=f"Session note {index} " * 4, type="event").dict()
+        for index in range(count)
+    ]
+
+
+def before(docs: List[dict]) -> bytes:
+    events = [Event(**doc) for doc in docs]
+    responses = [EventResponse(**event.dict()) for event in events]
+    validated = EventResponseList.validate_python(responses)
+    return json.dumps(EventResponseList.dump_python(validated, mode="json")).encode("utf-8")
+
+
+def after(docs: List[dict]) -> bytes:
+    return orjson.dumps(EventList.dump_python(EventList.validate_python(docs)))
+
+
+def per_event_microseconds(fn, docs: List[dict], rounds: int) -> float:
+    fn(docs)  # warm up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(docs)
+    return (time.perf_counter() - start) / rounds / len(docs) * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    docs = make_docs(args.events)
+    if json.loads(before(docs)) != json.loads(after(docs)):
+        print("before and after produce different JSON", file=sys.stderr)
+        return 1
+
+    before_us = per_event_microseconds(before, docs, args.rounds)
+    after_us = per_event_microseconds(after, docs, args.rounds)
+    print(json.dumps({
+        "events": args.events,
+        "rounds": args.rounds,
+        "before_us_per_event": round(before_us, 3),
+        "after_us_per_event": round(after_us, 3),
+        "speedup": round(before_us / after_us, 2),
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Cold-start report: how long a fresh backend process takes from launch to
+its first answered request, split into phases, as JSON.
+
+    python benchmarks/startup_time.py [--runs 5] [--engine memory|sqlite|mongo] [--output report.json]
+    python benchmarks/startup_time.py --check [--budget-ms 1000]
+
+Each run starts a new interpreter that imports server.py, runs the app's
+lifespan startup and sends GET /api/calendar/current-date over ASGI, which
+waits for storage initialization. Phase timings are medians over the runs:
+
+- ``interpreter_ms``: launching ``python -c pass``, the floor for any process
+- ``import_ms``: ``import server``, including every module it pulls in
+- ``first_request_ms``: lifespan startup until the first response
+- ``time_to_first_request_ms``: process launch until the first response
+
+One extra run under ``python -X importtime`` breaks ``import_ms`` down by
+the modules server.py imports directly. ``--check`` exits 1 if the first
+request failed, if the median time to first request is over budget, or if
+``import server`` loaded a module that should only be imported on first use
+(NumPy, pandas, boto3, Motor, PyMongo).
+
+The budget is set for the memory engine. With ``--engine mongo`` the
+process connects to MONGO_URL / DB_NAME as the server would, so its time
+includes that round trip; Motor and PyMongo are then imported during
+initialization, which is allowed.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Time-to-first-request budget, documented in contracts.md
+TIME_TO_FIRST_REQUEST_BUDGET_MS = 1000
+
+# Modules that ``import server`` must not load
+LAZY_MODULES = ["numpy", "pandas", "boto3", "motor", "pymongo"]
+
+
+def probe() -> None:
+    """Runs in the child process: time the phases and print them as one JSON line."""
+    sys.path.insert(0, str(BACKEND_DIR))
+    started = time.perf_counter()
+    import server
+    imported = time.perf_counter()
+    lazy_modules_loaded = [name for name in LAZY_MODULES if name in sys.modules]
+
+    import asyncio
+    import httpx
+
+    async def first_request() -> int:
+        async with server.app.router.lifespan_context(server.app):
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+                response = await client.get("/api/calendar/current-date")
+        return response.status_code
+
+    status = asyncio.run(first_request())
+    print(json.dumps({
+        "first_response_at": time.time(),
+        "status": status,
+        "import_ms": (imported - started) * 1000,
+        "first_request_ms": (time.perf_counter() - imported) * 1000,
+        "storage_initialize_ms": server.startup_timings.get("storage_initialize_ms"),
+        "lazy_modules_loaded": lazy_modules_loaded,
+    }))
+
+
+def run_child(args: List[str], env: Dict[str, str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, env=env, cwd=BACKEND_DIR, check=True
+    )
+
+
+def run_probe(env: Dict[str, str]) -> Dict:
+    launched = time.time()
+    result = json.loads(run_child([__file__, "--probe"], env).stdout.strip().splitlines()[-1])
+    result["time_to_first_request_ms"] = (result.pop("first_response_at") - launched) * 1000
+    return result
+
+
+def import_breakdown(env: Dict[str, str]) -> Dict[str, float]:
+    """Cumulative import time of each module server.py imports directly, slowest first."""
+    stderr = run_child(["-X", "importtime", "-c", "import server"], env).stderr
+    children: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            if name.strip() == "server":
+                break
+            children = {}
+        elif depth == 1:
+            children[name.strip()] = int(cumulative) / 1000
+    return dict(sorted(children.items(), key=lambda item: -item[1]))
+
+
+def interpreter_ms(env: Dict[str, str]) -> float:
+    launched = time.perf_counter()
+    run_child(["-c", "pass"], env)
+    return (time.perf_counter() - launched) * 1000
+
+
+def report(args, env: Dict[str, str]) -> Dict:
+    runs = [run_probe(env) for _ in range(args.runs)]
+    phases = ["import_ms", "first_request_ms", "time_to_first_request_ms"]
+    return {
+        "config": {"engine": args.engine, "runs": args.runs, "python": sys.version.split()[0]},
+        "interpreter_ms": round(statistics.median(interpreter_ms(env) for _ in range(args.runs)), 1),
+        **{phase: round(statistics.median(run[phase] for run in runs), 1) for phase in phases},
+        "storage_initialize_ms": runs[-1]["storage_initialize_ms"],
+        "status": runs[-1]["status"],
+        "lazy_modules_loaded": sorted({name for run in runs for name in run["lazy_modules_loaded"]}),
+        "import_breakdown_ms": {name: round(ms, 1) for name, ms in import_breakdown(env).items()},
+    }
+
+
+def check(results: Dict, budget_ms: float) -> List[str]:
+    problems = []
+    if results["status"] != 200:
+        problems.append(f"first request answered {results['status']}")
+    if results["time_to_first_request_ms"] > budget_ms:
+        problems.append(f"time to first request {results['time_to_first_request_ms']} ms is over {budget_ms} ms")
+    if results["lazy_modules_loaded"]:
+        problems.append(f"imported by import server: {', '.join(results['lazy_modules_loaded'])}")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--runs", type=int, default=5, help="Processes to start; timings are medians")
+    parser.add_argument("--engine", choices=["memory", "sqlite", "mongo"], default="memory")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if the budget is exceeded")
+    parser.add_argument("--budget-ms", type=float, default=TIME_TO_FIRST_REQUEST_BUDGET_MS)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--probe", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        probe()
+        return 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = {
+            **os.environ,
+            "STORAGE_ENGINE": args.engine,
+            "SQLITE_PATH": os.path.join(directory, "startup.db"),
+            # Keep request logging out of the measurement
+            "TRACE_SAMPLE_RATE": "0",
+        }
+        results = report(args, env)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    if args.check:
+        problems = check(results, args.budget_ms)
+        for problem in problems:
+            print(f"FAIL: {problem}", file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
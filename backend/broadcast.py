@@ -0,0 +1,86 @@
+from typing import Any, AsyncIterator, Dict, Optional, Set
+import asyncio
+
+import orjson
+
+
+class Subscription:
+    """One client's bounded queue of encoded change messages."""
+
+    def __init__(self, maxsize: int):
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+
+
+class Broadcaster:
+    """In-process fan-out of change messages to Server-Sent-Events subscribers.
+
+    Each message is serialized once and offered to every subscriber without
+    waiting. A subscriber whose queue is full is too slow to keep up: it is
+    dropped and its stream ends, and the client reconnects and refetches.
+    Not thread-safe; it is meant for use from a single asyncio event loop.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Set[Subscription] = set()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.queue_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> None:
+        """Queue a message for every subscriber; never blocks the publisher."""
+        if not self._subscribers:
+            return
+        self.published += 1
+        message = b"event: " + event_type.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+        for subscription in list(self._subscribers):
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+
+    def _drop(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+        subscription.dropped = True
+        self.dropped += 1
+        # Make room for the end-of-stream marker; the client refetches anyway
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+
+    async def stream(self, subscription: Subscription, heartbeat: float = 15.0) -> AsyncIterator[bytes]:
+        """Yield a subscriber's messages as SSE frames until it is dropped.
+
+        A comment line is sent after ``heartbeat`` idle seconds so proxies keep
+        the connection open and a disconnected client is noticed.
+        """
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                if message is None:
+                    yield b"event: dropped\ndata: {}\n\n"
+                    return
+                yield message
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "queue_size": self.queue_size,
+            "published": self.published,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+import asyncio
+import time
+
+T = TypeVar("T")
+
+
+class LRUCache:
+    """Bounded least-recently-used cache with a per-entry TTL and hit/miss counters.
+
+    Not thread-safe; it is meant for use from a single asyncio event loop.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 10.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Bumped on every invalidation; a fill that started before an
+        # invalidation must not store the result it read
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expired entry."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires = entry
+        if time.monotonic() >= expires:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def fill_token(self) -> int:
+        """Token to pass to set() for a value about to be read from storage."""
+        return self._generation
+
+    def set(self, key: Hashable, value: Any, token: Optional[int] = None) -> None:
+        """Store a value, unless the cache was invalidated since ``token`` was taken."""
+        if self.maxsize <= 0 or (token is not None and token != self._generation):
+            return
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._generation += 1
+        self.invalidations += 1
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self.invalidations += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one in-flight awaitable.
+
+    The first caller starts the call; callers arriving while it runs await the
+    same task and share its result or exception. Nothing is kept once the call
+    finishes, so this deduplicates bursts without caching anything.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Task"] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget_task(key, done))
+        else:
+            self.shared += 1
+        # Shielded so one caller being cancelled does not cancel the others
+        return await asyncio.shield(task)
+
+    def _forget_task(self, key: Hashable, task: "asyncio.Task") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def forget(self, key: Hashable) -> None:
+        """Make later callers start a new call instead of joining one already running.
+
+        Used after a write: a read that started before it may return old data.
+        """
+        self._calls.pop(key, None)
+
+    def forget_matching(self, predicate: Callable[[Hashable], bool]) -> None:
+        for key in [key for key in self._calls if predicate(key)]:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"in_flight": len(self._calls), "calls": self.calls, "shared": self.shared}
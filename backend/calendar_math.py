@@ -0,0 +1,177 @@
+"""Arithmetic for the custom calendar: 10 months of 30 days, years starting at 1.
+
+Every month is exactly three 10-day weeks, so each month (and year) starts on
+the first weekday and a date's weekday depends only on its day of the month.
+Scalar functions take and return (year, month, day) tuples; the ``*_batch``
+variants do the same on NumPy arrays for converting many dates at once.
+NumPy is imported on first use of a batch function, not with this module.
+"""
+from typing import TYPE_CHECKING, List, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+CustomDate = Tuple[int, int, int]
+
+MONTHS_PER_YEAR = 10
+DAYS_PER_MONTH = 30
+DAYS_PER_WEEK = 10
+DAYS_PER_YEAR = MONTHS_PER_YEAR * DAYS_PER_MONTH
+
+# Largest accepted year; keeps every ordinal well inside the 64-bit integers
+# used by NumPy, SQLite and BSON
+MAX_YEAR = 999_999_999
+MAX_ORDINAL = MAX_YEAR * DAYS_PER_YEAR - 1
+
+DAY_NAMES = [
+    'Peppermint Patty Day',
+    'Bing Bong Day',
+    'Wednesday',
+    'Chewsday',
+    'Mustang Day',
+    'Second Wednesday',
+    'Skip Day',
+    'Second Chewsday',
+    'Sabbath',
+    'Loin Cloth Day'
+]
+
+MONTH_NAMES = [
+    'Revan',
+    'Juno',
+    'Justin Thyme',
+    'Plato',
+    'Olivia Newton John',
+    'Palmetto',
+    'Juice Daddy',
+    'Retrograde',
+    'Blizzrock',
+    'Challenger'
+]
+
+
+def validate_date(year: int, month: int, day: int) -> CustomDate:
+    """Return the date unchanged, or raise ValueError if it is not a calendar date."""
+    if not 1 <= year <= MAX_YEAR:
+        raise ValueError(f"Year must be between 1 and {MAX_YEAR}, got {year}")
+    if not 0 <= month < MONTHS_PER_YEAR:
+        raise ValueError(f"Month must be between 0 and {MONTHS_PER_YEAR - 1}, got {month}")
+    if not 1 <= day <= DAYS_PER_MONTH:
+        raise ValueError(f"Day must be between 1 and {DAYS_PER_MONTH}, got {day}")
+    return year, month, day
+
+
+def parse_date(value: str) -> CustomDate:
+    """Parse and validate a ``Y-M-D`` date string."""
+    parts = value.split("-")
+    if len(parts) != 3:
+        raise ValueError(f"Invalid date '{value}', expected Y-M-D")
+    try:
+        year, month, day = (int(part) for part in parts)
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}', expected Y-M-D")
+    return validate_date(year, month, day)
+
+
+def format_date(year: int, month: int, day: int) -> str:
+    return f"{year}-{month}-{day}"
+
+
+def to_ordinal(year: int, month: int, day: int) -> int:
+    """Days since the calendar epoch; year 1, month 0, day 1 is ordinal 0."""
+    return (year - 1) * DAYS_PER_YEAR + month * DAYS_PER_MONTH + (day - 1)
+
+
+def from_ordinal(ordinal: int) -> CustomDate:
+    """Inverse of to_ordinal, returning (year, month, day)."""
+    years, day_of_year = divmod(ordinal, DAYS_PER_YEAR)
+    month, day_index = divmod(day_of_year, DAYS_PER_MONTH)
+    return years + 1, month, day_index + 1
+
+
+def add_days(date: CustomDate, days: int) -> CustomDate:
+    """The date ``days`` after ``date`` (before it when negative)."""
+    ordinal = to_ordinal(*date) + days
+    if ordinal < 0:
+        raise ValueError("Result is before year 1")
+    return from_ordinal(ordinal)
+
+
+def days_between(start: CustomDate, end: CustomDate) -> int:
+    """Number of days from ``start`` to ``end``; negative if ``end`` is earlier."""
+    return to_ordinal(*end) - to_ordinal(*start)
+
+
+def weekday_index(year: int, month: int, day: int) -> int:
+    """Position of the date in its 10-day week (0 is Peppermint Patty Day)."""
+    return (day - 1) % DAYS_PER_WEEK
+
+
+def weekday_name(year: int, month: int, day: int) -> str:
+    return DAY_NAMES[weekday_index(year, month, day)]
+
+
+def month_name(month: int) -> str:
+    return MONTH_NAMES[month]
+
+
+def month_bounds(year: int, month: int) -> Tuple[int, int]:
+    """First and last ordinal of a month, inclusive."""
+    first = to_ordinal(year, month, 1)
+    return first, first + DAYS_PER_MONTH - 1
+
+
+def year_bounds(year: int) -> Tuple[int, int]:
+    """First and last ordinal of a year, inclusive."""
+    first = to_ordinal(year, 0, 1)
+    return first, first + DAYS_PER_YEAR - 1
+
+
+def month_dates(year: int, month: int) -> List[CustomDate]:
+    return [(year, month, day) for day in range(1, DAYS_PER_MONTH + 1)]
+
+
+def to_ordinal_batch(years: Sequence[int], months: Sequence[int], days: Sequence[int]) -> "np.ndarray":
+    """Vectorized to_ordinal over equal-length sequences."""
+    import numpy as np
+
+    years = np.asarray(years, dtype=np.int64)
+    months = np.asarray(months, dtype=np.int64)
+    days = np.asarray(days, dtype=np.int64)
+    return (years - 1) * DAYS_PER_YEAR + months * DAYS_PER_MONTH + (days - 1)
+
+
+def from_ordinal_batch(ordinals: Sequence[int]) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Vectorized from_ordinal, returning arrays of years, months and days."""
+    import numpy as np
+
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    years, day_of_year = np.divmod(ordinals, DAYS_PER_YEAR)
+    months, day_index = np.divmod(day_of_year, DAYS_PER_MONTH)
+    return years + 1, months, day_index + 1
+
+
+def weekday_index_batch(ordinals: Sequence[int]) -> "np.ndarray":
+    """Vectorized weekday index for ordinals."""
+    import numpy as np
+
+    return np.asarray(ordinals, dtype=np.int64) % DAYS_PER_WEEK
+
+
+def describe_batch(ordinals: Sequence[int]) -> List[dict]:
+    """Date, weekday and month name for each ordinal, computed column-wise."""
+    import numpy as np
+
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    if (ordinals < 0).any():
+        raise ValueError("Ordinals must not be negative")
+    years, months, days = from_ordinal_batch(ordinals)
+    weekdays = weekday_index_batch(ordinals)
+    weekday_names = np.asarray(DAY_NAMES, dtype=object)[weekdays]
+    month_names = np.asarray(MONTH_NAMES, dtype=object)[months]
+    columns = zip(
+        years.tolist(), months.tolist(), days.tolist(), ordinals.tolist(),
+        weekdays.tolist(), weekday_names.tolist(), month_names.tolist()
+    )
+    keys = ("year", "month", "day", "ordinal", "weekday", "weekday_name", "month_name")
+    return [dict(zip(keys, row)) for row in columns]
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Command line backup tools for the calendar event store: events and
+recurrence rules as NDJSON, one per line tagged with its "kind".
+
+    python cli.py export [-o events.ndjson]
+    python cli.py import events.ndjson
+
+Uses the same STORAGE_ENGINE / MONGO_URL / DB_NAME settings as the server.
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from typing import AsyncIterator, TextIO
+
+from dotenv import load_dotenv
+
+from services import CalendarService, TRANSFER_BATCH_SIZE
+from storage import create_storage_engine
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+
+async def iter_file_lines(handle: TextIO) -> AsyncIterator[str]:
+    for line in handle:
+        yield line
+
+
+async def export_events(output: TextIO, batch_size: int) -> int:
+    storage = create_storage_engine(default_sqlite_path=str(ROOT_DIR / 'calendar.db'))
+    service = CalendarService(storage)
+    count = 0
+    try:
+        await storage.initialize()
+        async for chunk in service.export_events(batch_size):
+            output.write(chunk)
+            count += chunk.count("\n")
+    finally:
+        await storage.close()
+    return count
+
+
+async def import_events(handle: TextIO, batch_size: int):
+    storage = create_storage_engine(default_sqlite_path=str(ROOT_DIR / 'calendar.db'))
+    service = CalendarService(storage)
+    try:
+        await storage.initialize()
+        return await service.import_events(iter_file_lines(handle), batch_size)
+    finally:
+        await storage.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export or import calendar events and recurrence rules as NDJSON")
+    parser.add_argument("--batch-size", type=int, default=TRANSFER_BATCH_SIZE, help="Events per batch")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Write every event and recurrence rule as NDJSON")
+    export_parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+
+    import_parser = commands.add_parser("import", help="Insert events and recurrence rules from an NDJSON file")
+    import_parser.add_argument("input", help="Input file, or - for stdin")
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as output:
+                count = asyncio.run(export_events(output, args.batch_size))
+        else:
+            count = asyncio.run(export_events(sys.stdout, args.batch_size))
+        print(f"Exported {count} events and recurrence rules", file=sys.stderr)
+        return 0
+
+    if args.input == "-":
+        result = asyncio.run(import_events(sys.stdin, args.batch_size))
+    else:
+        with open(args.input, encoding="utf-8") as handle:
+            result = asyncio.run(import_events(handle, args.batch_size))
+    print(
+        f"Imported {result.inserted} events, skipped {result.skipped} existing; "
+        f"imported {result.recurrences_inserted} recurrence rules, skipped {result.recurrences_skipped} existing; "
+        f"{result.invalid} invalid lines",
+        file=sys.stderr
+    )
+    for error in result.errors:
+        print(f"  {error}", file=sys.stderr)
+    return 1 if result.invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
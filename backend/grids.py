@@ -0,0 +1,51 @@
+"""Pre-serialized calendar grids for the /calendar/dates endpoints.
+
+A month grid depends only on (year, month), so its JSON is built once and
+reused; the year grid combines those templates with live event counts.
+"""
+from functools import lru_cache
+from typing import Dict, Tuple
+
+import orjson
+
+from calendar_math import DAYS_PER_MONTH, DAYS_PER_YEAR, MONTHS_PER_YEAR, MONTH_NAMES, weekday_name
+
+# (day, custom day name) for every day of a month, computed once at import;
+# every month starts on the same weekday, so this is shared by all months
+DAY_TEMPLATE = [(day, weekday_name(1, 0, day)) for day in range(1, DAYS_PER_MONTH + 1)]
+
+# Month grids are immutable, so clients and proxies may keep them indefinitely
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@lru_cache(maxsize=1024)
+def month_grid_bytes(year: int, month: int) -> bytes:
+    """Serialized GET /calendar/dates/{year}/{month} response."""
+    return orjson.dumps({
+        "year": year,
+        "month": month,
+        "days": [
+            {"day": day, "month": month, "year": year, "custom_day_name": name}
+            for day, name in DAY_TEMPLATE
+        ],
+        "total_days": DAYS_PER_MONTH
+    })
+
+
+def year_grid_bytes(year: int, counts: Dict[Tuple[int, int], int]) -> bytes:
+    """Serialized year grid: every month's days with their event counts."""
+    return orjson.dumps({
+        "year": year,
+        "months": [
+            {
+                "month": month,
+                "month_name": MONTH_NAMES[month],
+                "days": [
+                    {"day": day, "custom_day_name": name, "event_count": counts.get((month, day), 0)}
+                    for day, name in DAY_TEMPLATE
+                ],
+            }
+            for month in range(MONTHS_PER_YEAR)
+        ],
+        "total_days": DAYS_PER_YEAR
+    })
@@ -0,0 +1,100 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+from typing import Any, Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Index definitions per collection. Names are fixed so verification does not
+# depend on MongoDB's generated "field_1_field_1" naming.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "events": [
+        IndexModel(
+            [("year", ASCENDING), ("month", ASCENDING), ("day", ASCENDING)],
+            name="year_month_day",
+        ),
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("ordinal", ASCENDING), ("type", ASCENDING)], name="ordinal_type"),
+        IndexModel(
+            [("ordinal", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)],
+            name="ordinal_created_id",
+        ),
+        IndexModel([("note", TEXT)], name="note_text"),
+        IndexModel([("changed_at", ASCENDING), ("id", ASCENDING)], name="changed_at_id"),
+    ],
+    "recurrences": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("start_ordinal", ASCENDING)], name="start_ordinal"),
+    ],
+    "tombstones": [
+        IndexModel([("deleted_at", ASCENDING), ("id", ASCENDING)], name="deleted_at_id"),
+    ],
+    "current_date": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+}
+
+# Representative filters for the CalendarService queries, used to explain
+# which plan MongoDB picks for each of them.
+SERVICE_QUERIES: Dict[str, Dict[str, Any]] = {
+    "get_events_for_month": {"collection": "events", "filter": {"year": 1, "month": 0}},
+    "get_events_between": {"collection": "events", "filter": {"ordinal": {"$gte": 0, "$lte": 89}, "type": "deadline"}},
+    "get_event_by_id": {"collection": "events", "filter": {"id": ""}},
+    "update_event": {"collection": "events", "filter": {"id": ""}},
+    "delete_event": {"collection": "events", "filter": {"id": ""}},
+}
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> Dict[str, List[str]]:
+    """Create the calendar indexes; existing indexes are left untouched."""
+    created = {}
+    for collection_name, models in INDEXES.items():
+        try:
+            created[collection_name] = await db[collection_name].create_indexes(models)
+        except OperationFailure as e:
+            # A unique index cannot be built over duplicate ids; keep serving
+            # and let verify_indexes() report the index as missing.
+            logger.error(f"Error creating indexes on {collection_name}: {e}")
+            created[collection_name] = []
+    return created
+
+
+async def verify_indexes(db: AsyncIOMotorDatabase) -> Dict[str, Dict[str, List[str]]]:
+    """Compare the expected indexes against what exists on each collection."""
+    report = {}
+    for collection_name, models in INDEXES.items():
+        expected = [model.document["name"] for model in models]
+        existing = list((await db[collection_name].index_information()).keys())
+        report[collection_name] = {
+            "expected": expected,
+            "existing": existing,
+            "missing": [name for name in expected if name not in existing],
+        }
+    return report
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten a winning plan into its stages, outermost first."""
+    stages = []
+    while plan:
+        stages.append({"stage": plan.get("stage"), "index": plan.get("indexName")})
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return stages
+
+
+async def explain_queries(db: AsyncIOMotorDatabase) -> Dict[str, Dict[str, Any]]:
+    """Explain the query plan MongoDB uses for each service method."""
+    plans = {}
+    for method, query in SERVICE_QUERIES.items():
+        explanation = await db[query["collection"]].find(query["filter"]).explain()
+        winning_plan = explanation["queryPlanner"]["winningPlan"]
+        # Slot-based execution nests the classic plan under "queryPlan"
+        stages = _plan_stages(winning_plan.get("queryPlan", winning_plan))
+        plans[method] = {
+            "collection": query["collection"],
+            "filter": query["filter"],
+            "stages": stages,
+            "uses_index": not any(stage["stage"] == "COLLSCAN" for stage in stages),
+        }
+    return plans
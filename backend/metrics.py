@@ -0,0 +1,296 @@
+"""Prometheus-style metrics: request, service and storage latency histograms,
+an in-flight gauge, and cache counters, rendered in the text exposition format.
+
+Only what the API needs is implemented here instead of depending on
+prometheus_client. Not thread-safe; it is meant for use from a single
+asyncio event loop.
+"""
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+import bisect
+import functools
+import inspect
+import time
+
+from tracing import Span, count_documents
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (label values, sample value) pairs reported by a callback metric
+Samples = Iterable[Tuple[Dict[str, str], float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def _key(self, labelvalues: Tuple[str, ...]) -> Tuple[str, ...]:
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(value) for value in labelvalues)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"] + self.samples()
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        key = self._key(labelvalues)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self._labels(key))} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labelvalues: str, amount: float = 1) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        key = self._key(labelvalues)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in sorted(self._series.items()):
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class CallbackMetric(Metric):
+    """Counter or gauge whose samples are read from existing state at scrape time."""
+
+    def __init__(self, name: str, help: str, type: str, collect: Callable[[], Samples]):
+        super().__init__(name, help)
+        self.type = type
+        self.collect = collect
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(value)}" for labels, value in self.collect()]
+
+
+REGISTRY: List[Metric] = []
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template and status",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being handled")
+SERVICE_DURATION = Histogram(
+    "calendar_service_duration_seconds", "CalendarService method latency, including cache hits", ["method"],
+)
+STORAGE_DURATION = Histogram(
+    "calendar_storage_duration_seconds", "Storage engine call latency by calling CalendarService method",
+    ["engine", "operation", "method"],
+)
+
+# CalendarService method currently running in this task, for labelling storage calls
+_service_method: ContextVar[str] = ContextVar("service_method", default="none")
+
+
+def timed(fn: Callable) -> Callable:
+    """Record a CalendarService method's latency in SERVICE_DURATION and trace it as a span."""
+    name = fn.__name__
+    if inspect.isasyncgenfunction(fn):
+        @functools.wraps(fn)
+        async def generator_wrapper(*args, **kwargs):
+            # Timed from first step to exhaustion. The context variable is set
+            # around each step only, since the consumer's context is only ours
+            # until the next yield.
+            generator = fn(*args, **kwargs)
+            start = time.perf_counter()
+            with Span(f"service.{name}", args[1:], kwargs) as span:
+                span.documents = 0
+                try:
+                    while True:
+                        token = _service_method.set(name)
+                        try:
+                            item = await generator.__anext__()
+                        except StopAsyncIteration:
+                            return
+                        finally:
+                            _service_method.reset(token)
+                        span.documents += 1
+                        yield item
+                finally:
+                    await generator.aclose()
+                    SERVICE_DURATION.observe(time.perf_counter() - start, name)
+        return generator_wrapper
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        token = _service_method.set(name)
+        start = time.perf_counter()
+        try:
+            # args[0] is the service itself
+            with Span(f"service.{name}", args[1:], kwargs) as span:
+                result = await fn(*args, **kwargs)
+                span.documents = count_documents(result)
+                return result
+        finally:
+            SERVICE_DURATION.observe(time.perf_counter() - start, name)
+            _service_method.reset(token)
+    return wrapper
+
+
+def instrument_storage(engine):
+    """Time and trace every public storage call of ``engine``; returns the engine.
+
+    Storage spans are the slow-query log: a slow call is logged with its
+    arguments and the number of documents it returned.
+    """
+    for operation, function in inspect.getmembers(type(engine), inspect.isfunction):
+        if operation.startswith("_"):
+            continue
+        bound = getattr(engine, operation)
+        if inspect.isasyncgenfunction(function):
+            setattr(engine, operation, _timed_storage_generator(engine.name, operation, bound))
+        elif inspect.iscoroutinefunction(function):
+            setattr(engine, operation, _timed_storage_call(engine.name, operation, bound))
+    return engine
+
+
+def _timed_storage_call(engine_name: str, operation: str, call: Callable) -> Callable:
+    @functools.wraps(call)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            with Span(f"{engine_name}.{operation}", args, kwargs) as span:
+                result = await call(*args, **kwargs)
+                span.documents = count_documents(result)
+                return result
+        finally:
+            STORAGE_DURATION.observe(time.perf_counter() - start, engine_name, operation, _service_method.get())
+    return wrapper
+
+
+def _timed_storage_generator(engine_name: str, operation: str, call: Callable) -> Callable:
+    @functools.wraps(call)
+    async def wrapper(*args, **kwargs):
+        method = _service_method.get()
+        start = time.perf_counter()
+        try:
+            with Span(f"{engine_name}.{operation}", args, kwargs) as span:
+                span.documents = 0
+                async for item in call(*args, **kwargs):
+                    # Batch generators yield lists of documents
+                    span.documents += len(item) if isinstance(item, list) else 1
+                    yield item
+        finally:
+            STORAGE_DURATION.observe(time.perf_counter() - start, engine_name, operation, method)
+    return wrapper
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency and the in-flight gauge.
+
+    Requests are labelled with the matched route's path template, so
+    /api/events/2025/3 and /api/events/2025/4 share a series; unmatched paths
+    share one "unmatched" series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            REQUEST_DURATION.observe(time.perf_counter() - start, scope["method"], template, str(status))
+
+
+def cache_samples(caches: Dict[str, Any], field: str) -> List[Tuple[Dict[str, str], float]]:
+    """One stats() field of each named LRUCache, labelled by cache name."""
+    return [({"cache": name}, cache.stats()[field]) for name, cache in caches.items()]
+
+
+def lru_cache_samples(functions: Dict[str, Any], field: str) -> List[Tuple[Dict[str, str], float]]:
+    """One cache_info() field of each named functools.lru_cache function."""
+    return [({"cache": name}, getattr(function.cache_info(), field)) for name, function in functions.items()]
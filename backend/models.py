@@ -1,22 +1,31 @@
-from pydantic import BaseModel, Field, validator
-from typing import Optional, List
-from datetime import datetime
+from pydantic import BaseModel, Field, TypeAdapter, validator
+from typing import Annotated, Any, Dict, Optional, List
+from datetime import datetime, timezone
 import uuid
 
+from calendar_math import MAX_ORDINAL, MAX_YEAR, parse_date, to_ordinal
+from recurrence import FREQUENCY_DAYS
+
+def naive_utc(value: datetime) -> datetime:
+    """A datetime as naive UTC, the form every stored timestamp uses."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
 class CurrentDateCreate(BaseModel):
     month: int = Field(..., ge=0, le=9, description="Month index (0-9)")
     day: int = Field(..., ge=1, le=30, description="Day of month (1-30)")
-    year: int = Field(..., ge=1, description="Year")
+    year: int = Field(..., ge=1, le=MAX_YEAR, description="Year")
 
 class CurrentDate(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     month: int = Field(..., ge=0, le=9)
     day: int = Field(..., ge=1, le=30) 
-    year: int = Field(..., ge=1)
+    year: int = Field(..., ge=1, le=MAX_YEAR)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 class EventCreate(BaseModel):
-    year: int = Field(..., ge=1, description="Year")
+    year: int = Field(..., ge=1, le=MAX_YEAR, description="Year")
     month: int = Field(..., ge=0, le=9, description="Month index (0-9)")
     day: int = Field(..., ge=1, le=30, description="Day of month (1-30)")
     note: str = Field(..., min_length=1, max_length=500, description="Event note")
@@ -29,6 +38,14 @@ class EventCreate(BaseModel):
             raise ValueError(f"Type must be one of: {allowed_types}")
         return v
 
+class EventImport(EventCreate):
+    """One line of an NDJSON import: EventCreate's rules plus the stored identity fields."""
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), min_length=1, max_length=100)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    _naive_utc = validator('created_at', 'updated_at', allow_reuse=True)(naive_utc)
+
 class EventUpdate(BaseModel):
     note: Optional[str] = Field(None, min_length=1, max_length=500)
     type: Optional[str] = Field(None)
@@ -50,6 +67,19 @@ class Event(BaseModel):
     type: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    ordinal: Optional[int] = None
+    # Set on occurrences generated from a recurrence rule
+    recurrence_id: Optional[str] = None
+
+    @validator('ordinal', always=True)
+    def compute_ordinal(cls, v, values):
+        # Always derived from the date so stored ordinals cannot drift
+        if all(field in values for field in ('year', 'month', 'day')):
+            return to_ordinal(values['year'], values['month'], values['day'])
+        return v
+
+# Validates/serializes a whole list of events in one call instead of per event
+EventList = TypeAdapter(List[Event])
 
 class EventResponse(BaseModel):
     id: str
@@ -59,4 +89,177 @@ class EventResponse(BaseModel):
     note: str
     type: str
     created_at: datetime
-    updated_at: datetime
\ No newline at end of file
+    updated_at: datetime
+    ordinal: Optional[int] = None
+    recurrence_id: Optional[str] = None
+
+class BulkEventOperation(BaseModel):
+    op: str = Field(..., description="Operation: create, update or delete")
+    id: Optional[str] = Field(None, description="Event ID for update and delete")
+    data: Optional[Dict[str, Any]] = Field(None, description="EventCreate fields for create, EventUpdate fields for update")
+
+class BulkEventRequest(BaseModel):
+    operations: List[BulkEventOperation] = Field(..., min_length=1, max_length=5000)
+
+class BulkEventResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[str] = None
+    status: str  # created, updated, deleted, not_found or error
+    error: Optional[str] = None
+
+class BulkEventResponse(BaseModel):
+    results: List[BulkEventResult]
+    created: int
+    updated: int
+    deleted: int
+    failed: int
+
+class EventImportResult(BaseModel):
+    inserted: int = 0
+    skipped: int = Field(0, description="Events whose id already exists")
+    recurrences_inserted: int = 0
+    recurrences_skipped: int = Field(0, description="Recurrence rules whose id already exists")
+    invalid: int = Field(0, description="Lines that are not valid events or recurrence rules")
+    errors: List[str] = Field(default_factory=list, description="First few invalid lines and why")
+
+class EventPage(BaseModel):
+    events: List[EventResponse]
+    limit: int
+    next_cursor: Optional[str] = None
+
+class EventSearchHit(EventResponse):
+    score: float
+
+class EventSearchPage(BaseModel):
+    query: str
+    events: List[EventSearchHit]
+    limit: int
+    offset: int
+    next_offset: Optional[int] = None
+
+class EventTombstone(BaseModel):
+    id: str
+    deleted_at: datetime
+
+class EventChanges(BaseModel):
+    events: List[Event] = Field(..., description="Events created or updated since the token")
+    deleted: List[EventTombstone] = Field(..., description="Events deleted since the token")
+    next_token: Optional[str] = Field(None, description="Pass as since to get the changes after these")
+    has_more: bool = False
+    recurrences_changed: bool = Field(
+        False, description="Recurrence rules were created, deleted or imported since the token; reload them"
+    )
+
+class EventDaySummary(BaseModel):
+    month: int
+    day: int
+    total: int
+    types: Dict[str, int]
+
+class EventYearSummary(BaseModel):
+    year: int
+    total: int
+    days: List[EventDaySummary]
+
+class RecurrenceCreate(BaseModel):
+    year: int = Field(..., ge=1, le=MAX_YEAR, description="Year of the first occurrence")
+    month: int = Field(..., ge=0, le=9, description="Month of the first occurrence (0-9)")
+    day: int = Field(..., ge=1, le=30, description="Day of the first occurrence (1-30)")
+    note: str = Field(..., min_length=1, max_length=500, description="Event note")
+    type: str = Field(default="event", description="Event type")
+    frequency: str = Field(..., description="daily, weekly (10 days), monthly (30 days) or yearly (300 days)")
+    interval: int = Field(1, ge=1, le=1000, description="Repeat every N periods")
+    until: Optional[str] = Field(None, description="Last date an occurrence may fall on, as Y-M-D")
+
+    @validator('type')
+    def validate_type(cls, v):
+        allowed_types = ["event", "special", "deadline", "today"]
+        if v not in allowed_types:
+            raise ValueError(f"Type must be one of: {allowed_types}")
+        return v
+
+    @validator('frequency')
+    def validate_frequency(cls, v):
+        if v not in FREQUENCY_DAYS:
+            raise ValueError(f"Frequency must be one of: {list(FREQUENCY_DAYS)}")
+        return v
+
+    @validator('until')
+    def validate_until(cls, v, values):
+        if v is not None:
+            until = parse_date(v)
+            if all(field in values for field in ('year', 'month', 'day')) and \
+                    until < (values['year'], values['month'], values['day']):
+                raise ValueError("until must not be before the first occurrence")
+        return v
+
+class RecurrenceImport(RecurrenceCreate):
+    """A ``"kind": "recurrence"`` line of an NDJSON import: RecurrenceCreate's rules plus the stored identity fields."""
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), min_length=1, max_length=100)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    _naive_utc = validator('created_at', 'updated_at', allow_reuse=True)(naive_utc)
+
+class Recurrence(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    year: int
+    month: int
+    day: int
+    note: str
+    type: str
+    frequency: str
+    interval: int = 1
+    until: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    start_ordinal: Optional[int] = None
+    end_ordinal: Optional[int] = None
+
+    @validator('start_ordinal', always=True)
+    def compute_start_ordinal(cls, v, values):
+        if all(field in values for field in ('year', 'month', 'day')):
+            return to_ordinal(values['year'], values['month'], values['day'])
+        return v
+
+    @validator('end_ordinal', always=True)
+    def compute_end_ordinal(cls, v, values):
+        return to_ordinal(*parse_date(values['until'])) if values.get('until') else None
+
+class CalendarAdvanceRequest(BaseModel):
+    days: int = Field(..., ge=1, le=3000, description="Number of days to move the current date forward")
+
+class CalendarAdvanceResponse(BaseModel):
+    previous: CurrentDateCreate
+    current: CurrentDate
+    days: int
+    events: List[Event] = Field(..., description="Events on the days that elapsed, after the previous date through the new one")
+    deadlines: List[Event] = Field(..., description="The deadline events among them")
+
+class CalendarConvertRequest(BaseModel):
+    dates: List[str] = Field(default_factory=list, max_length=10000, description="Dates as Y-M-D")
+    ordinals: List[Annotated[int, Field(le=MAX_ORDINAL)]] = Field(
+        default_factory=list, max_length=10000, description="Days since year 1, month 0, day 1"
+    )
+
+class CalendarDate(BaseModel):
+    year: int
+    month: int
+    day: int
+    ordinal: int
+    weekday: int
+    weekday_name: str
+    month_name: str
+
+class CalendarConvertResponse(BaseModel):
+    dates: List[CalendarDate]
+    ordinals: List[CalendarDate]
+
+class CalendarDiffResponse(BaseModel):
+    start: CalendarDate
+    end: CalendarDate
+    days: int = Field(..., description="Days from start to end, negative if end is earlier")
+    years: int
+    months: int
+    remaining_days: int = Field(..., description="Days left over after whole years and months")
@@ -0,0 +1,76 @@
+"""Expansion of recurrence rules into event occurrences.
+
+Every period of the custom calendar has a fixed length (10-day weeks,
+30-day months, 300-day years), so a rule's occurrences are exactly the
+ordinals ``start + k * step`` and can be computed for any window without
+walking the calendar. Only rules are stored; occurrences are generated for
+the window a query asks for.
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from calendar_math import DAYS_PER_MONTH, DAYS_PER_WEEK, DAYS_PER_YEAR, from_ordinal
+
+FREQUENCY_DAYS = {
+    "daily": 1,
+    "weekly": DAYS_PER_WEEK,
+    "monthly": DAYS_PER_MONTH,
+    "yearly": DAYS_PER_YEAR,
+}
+
+
+def rule_step(rule: Dict[str, Any]) -> int:
+    """Days between two consecutive occurrences of a rule."""
+    return FREQUENCY_DAYS[rule['frequency']] * rule['interval']
+
+
+@lru_cache(maxsize=4096)
+def occurrence_ordinals(
+    start_ordinal: int, step: int, end_ordinal: Optional[int], window_start: int, window_end: int
+) -> Tuple[int, ...]:
+    """Ordinals of a rule's occurrences inside a window, inclusive.
+
+    Memoized on the rule's schedule and the window, so repeated reads of the
+    same month or range do not recompute it.
+    """
+    last = window_end if end_ordinal is None else min(window_end, end_ordinal)
+    first = max(window_start, start_ordinal)
+    if first > last:
+        return ()
+    # First multiple of step at or after the window start
+    first = start_ordinal + -(-(first - start_ordinal) // step) * step
+    return tuple(range(first, last + 1, step))
+
+
+def occurrence_id(rule_id: str, ordinal: int) -> str:
+    return f"{rule_id}:{ordinal}"
+
+
+def expand_rules(
+    rules: List[Dict[str, Any]], window_start: int, window_end: int, event_type: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Event documents for every occurrence of ``rules`` in a window, sorted by
+    (ordinal, created_at, id) like stored events."""
+    occurrences = []
+    for rule in rules:
+        if event_type and rule['type'] != event_type:
+            continue
+        ordinals = occurrence_ordinals(
+            rule['start_ordinal'], rule_step(rule), rule.get('end_ordinal'), window_start, window_end
+        )
+        for ordinal in ordinals:
+            year, month, day = from_ordinal(ordinal)
+            occurrences.append({
+                'id': occurrence_id(rule['id'], ordinal),
+                'year': year,
+                'month': month,
+                'day': day,
+                'note': rule['note'],
+                'type': rule['type'],
+                'created_at': rule['created_at'],
+                'updated_at': rule['updated_at'],
+                'ordinal': ordinal,
+                'recurrence_id': rule['id'],
+            })
+    occurrences.sort(key=lambda doc: (doc['ordinal'], doc['created_at'], doc['id']))
+    return occurrences
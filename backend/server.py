@@ -1,36 +1,203 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from contextlib import asynccontextmanager, suppress
+import asyncio
 import os
+import time
 import logging
+import orjson
 from pathlib import Path
-from typing import List
+from typing import AsyncIterator, List, Optional, Union
 
 # Import our models and services
-from models import CurrentDate, CurrentDateCreate, Event, EventCreate, EventUpdate, EventResponse
-from services import CalendarService
+from models import (
+    BulkEventRequest, BulkEventResponse, EventImportResult, CalendarAdvanceRequest, CalendarAdvanceResponse,
+    CalendarConvertRequest, CalendarConvertResponse, CalendarDiffResponse,
+    CurrentDate, CurrentDateCreate, Event, EventCreate, EventList, EventUpdate, EventResponse,
+    EventChanges, EventPage, EventSearchPage, EventYearSummary, Recurrence, RecurrenceCreate,
+)
+from services import CalendarService, ChangeTokenExpired
+import calendar_math
+import metrics
+import tracing
+import recurrence
+from calendar_math import DAYS_PER_MONTH, month_bounds, to_ordinal
+from cache import LRUCache, SingleFlight
+from grids import IMMUTABLE_CACHE_CONTROL, month_grid_bytes, year_grid_bytes
+from storage import CustomDate, create_storage_engine
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Storage engine selected by STORAGE_ENGINE: "mongo" (default), "memory" or "sqlite"
+storage = metrics.instrument_storage(create_storage_engine(default_sqlite_path=str(ROOT_DIR / 'calendar.db')))
+
+# Durations of the startup phases run after import, in milliseconds
+startup_timings = {}
+
+# Seconds between storage initialization attempts, doubling up to the maximum
+STORAGE_RETRY_MIN = float(os.environ.get('STORAGE_RETRY_MIN', '1'))
+STORAGE_RETRY_MAX = float(os.environ.get('STORAGE_RETRY_MAX', '30'))
+
+async def initialize_storage(app: FastAPI) -> None:
+    """Initialize storage, retrying with backoff until it succeeds.
+
+    The last failure is kept in ``app.state.storage_error`` until an attempt
+    succeeds; ``app.state.storage_attempted`` is set once the first attempt ends.
+    """
+    started = time.perf_counter()
+    delay = STORAGE_RETRY_MIN
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            await storage.initialize()
+            break
+        except Exception as e:
+            app.state.storage_error = f"Error initializing {storage.name} storage: {e}"
+            logger.error(f"{app.state.storage_error} (attempt {attempts}, retrying in {delay:g} s)")
+        finally:
+            app.state.storage_attempted.set()
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, STORAGE_RETRY_MAX)
+    app.state.storage_error = None
+    startup_timings["storage_initialize_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    startup_timings["storage_initialize_attempts"] = attempts
+    logger.info(
+        f"Custom Calendar API started successfully ({storage.name} storage, "
+        f"initialized in {startup_timings['storage_initialize_ms']} ms)"
+    )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Storage connects and prepares its indexes in the background, inside the
+    # serving event loop, so the process accepts connections at once. Requests
+    # that need storage wait for the first attempt in get_calendar_service and
+    # get 503 while it keeps failing; the readiness probe answers 503 until
+    # initialization has succeeded.
+    app.state.storage_error = None
+    app.state.storage_attempted = asyncio.Event()
+    app.state.storage_ready = asyncio.create_task(initialize_storage(app))
+    yield
+    app.state.storage_ready.cancel()
+    with suppress(asyncio.CancelledError):
+        await app.state.storage_ready
+    await storage.close()
+    logger.info("Database connection closed")
+
+async def wait_for_storage(app: FastAPI) -> None:
+    """Wait for the first storage initialization attempt, if the app was started with its lifespan.
+
+    Raises a 503 HTTPException while initialization has failed and is being retried.
+    """
+    ready = getattr(app.state, "storage_ready", None)
+    if ready is None or ready.done():
+        return
+    await app.state.storage_attempted.wait()
+    if app.state.storage_error:
+        raise HTTPException(status_code=503, detail=app.state.storage_error)
 
 # Create the main app without a prefix
-app = FastAPI(title="Custom Calendar API", version="1.0.0")
+app = FastAPI(
+    title="Custom Calendar API", version="1.0.0", default_response_class=ORJSONResponse, lifespan=lifespan
+)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
 # Initialize services
-calendar_service = CalendarService(db)
+calendar_service = CalendarService(
+    storage,
+    current_date_ttl=float(os.environ.get('CURRENT_DATE_CACHE_TTL', '5')),
+    month_cache_size=int(os.environ.get('MONTH_CACHE_SIZE', '256')),
+    stream_queue_size=int(os.environ.get('STREAM_QUEUE_SIZE', '100')),
+    tombstone_retention_days=float(os.environ.get('TOMBSTONE_RETENTION_DAYS', '30'))
+)
+
+# Operations slower than SLOW_OPERATION_MS are logged with their filter and
+# result size; TRACE_SAMPLE_RATE of requests have every span logged
+tracing.configure(
+    slow_operation_ms=float(os.environ.get('SLOW_OPERATION_MS', '100')),
+    sampling=float(os.environ.get('TRACE_SAMPLE_RATE', '0.01'))
+)
+
+# Seconds between keep-alive comments on idle /api/stream connections
+STREAM_HEARTBEAT = float(os.environ.get('STREAM_HEARTBEAT', '15'))
+
+# Serialized year grids keyed by (year, month versions); a write to any month
+# of the year changes the key, so entries never need invalidating
+year_grid_cache = LRUCache(maxsize=64, ttl=3600)
+
+# Cache and stream counters exported by /api/metrics, read at scrape time
+CACHES = {"month_events": calendar_service.month_cache, "year_grid": year_grid_cache}
+MEMOIZED = {"month_grid": month_grid_bytes, "recurrence_ordinals": recurrence.occurrence_ordinals}
+for field in ("hits", "misses"):
+    metrics.CallbackMetric(
+        f"calendar_cache_{field}_total", f"Cache {field} by cache", "counter",
+        lambda field=field: metrics.cache_samples(CACHES, field) + metrics.lru_cache_samples(MEMOIZED, field),
+    )
+metrics.CallbackMetric(
+    "calendar_cache_evictions_total", "Entries evicted to stay within a cache's size", "counter",
+    lambda: metrics.cache_samples(CACHES, "evictions"),
+)
+metrics.CallbackMetric(
+    "calendar_cache_entries", "Entries currently held by each cache", "gauge",
+    lambda: metrics.cache_samples(CACHES, "size") + metrics.lru_cache_samples(MEMOIZED, "currsize"),
+)
+metrics.CallbackMetric(
+    "calendar_single_flight_calls_total", "Loads requested through read coalescing", "counter",
+    lambda: [({}, calendar_service.flights.calls)],
+)
+metrics.CallbackMetric(
+    "calendar_single_flight_shared_total", "Loads answered by joining an in-flight call", "counter",
+    lambda: [({}, calendar_service.flights.shared)],
+)
+metrics.CallbackMetric(
+    "calendar_stream_subscribers", "Connected /api/stream clients", "gauge",
+    lambda: [({}, calendar_service.changes.stats()["subscribers"])],
+)
+metrics.CallbackMetric(
+    "calendar_stream_published_total", "Change messages broadcast to stream clients", "counter",
+    lambda: [({}, calendar_service.changes.published)],
+)
+metrics.CallbackMetric(
+    "calendar_stream_dropped_total", "Stream clients dropped for falling behind", "counter",
+    lambda: [({}, calendar_service.changes.dropped)],
+)
+
+def pool_samples(*fields: str) -> List:
+    """Connection pool counters labelled by state; none for engines without a pool."""
+    stats = storage.pool_stats()
+    return [({"state": field}, stats[field]) for field in fields] if stats else []
+
+metrics.CallbackMetric(
+    "storage_pool_connections", "Database connections by state", "gauge",
+    lambda: pool_samples("open", "in_use", "waiting"),
+)
+metrics.CallbackMetric(
+    "storage_pool_checkouts_total", "Connection checkouts by outcome", "counter",
+    lambda: pool_samples("checkouts", "checkout_failures"),
+)
+
+# Readiness probe results are reused for READY_CACHE_TTL seconds, so frequent
+# probes from every worker's orchestrator cost one ping per interval
+READY_CACHE_TTL = float(os.environ.get('READY_CACHE_TTL', '2'))
+READY_TIMEOUT = float(os.environ.get('READY_TIMEOUT', '2'))
+readiness_cache = LRUCache(maxsize=1, ttl=READY_CACHE_TTL)
+readiness_flight = SingleFlight()
+
+# Page size for paginated event listings when only a cursor is given
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Used when no current date has been set yet
+DEFAULT_CURRENT_DATE = CurrentDateCreate(month=2, day=15, year=2025)  # Justin Thyme, day 15
 
 # Dependency to get calendar service
-async def get_calendar_service():
+async def get_calendar_service(request: Request):
+    await wait_for_storage(request.app)
     return calendar_service
 
 # Health check endpoint
@@ -42,13 +209,8 @@ async def root():
 @api_router.get("/calendar/current-date", response_model=CurrentDate)
 async def get_current_date(service: CalendarService = Depends(get_calendar_service)):
     """Get the current custom date."""
-    current_date = await service.get_current_date()
-    if current_date:
-        return current_date
-    
     # If no current date exists, create a default one
-    default_date = CurrentDateCreate(month=2, day=15, year=2025)  # Justin Thyme, day 15
-    return await service.set_current_date(default_date)
+    return await service.get_or_create_current_date(DEFAULT_CURRENT_DATE)
 
 @api_router.put("/calendar/current-date", response_model=CurrentDate)
 async def set_current_date(
@@ -61,6 +223,31 @@ async def set_current_date(
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error setting current date: {str(e)}")
 
+@api_router.post("/calendar/advance", response_model=CalendarAdvanceResponse)
+async def advance_current_date(
+    request: CalendarAdvanceRequest,
+    service: CalendarService = Depends(get_calendar_service)
+):
+    """Move the current date forward and return the events on the days that elapsed."""
+    try:
+        previous, current = await service.advance_current_date(request.days, DEFAULT_CURRENT_DATE)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error advancing current date: {str(e)}")
+
+    # One range query over the elapsed window: the day after the previous
+    # date through the new current date
+    events = await service.get_events_between(
+        calendar_math.add_days(previous, 1), (current.year, current.month, current.day)
+    )
+    year, month, day = previous
+    return ORJSONResponse({
+        "previous": {"year": year, "month": month, "day": day},
+        "current": current.dict(),
+        "days": request.days,
+        "events": EventList.dump_python(events),
+        "deadlines": EventList.dump_python([event for event in events if event.type == "deadline"]),
+    })
+
 @api_router.get("/calendar/dates/{year}/{month}")
 async def get_dates_for_month(
     year: int,
@@ -71,21 +258,79 @@ async def get_dates_for_month(
     if month < 0 or month > 9:
         raise HTTPException(status_code=400, detail="Month must be between 0 and 9")
     
-    # Return basic month structure (30 days)
-    days = []
-    for day in range(1, 31):
-        days.append({
-            "day": day,
-            "month": month,
-            "year": year,
-            "custom_day_name": get_custom_day_name(day - 1)  # day-1 for 0-based indexing
-        })
-    
+    # Basic month structure (30 days), serialized once per month
+    return Response(
+        month_grid_bytes(year, month),
+        media_type="application/json",
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    )
+
+@api_router.get("/calendar/dates/{year}")
+async def get_dates_for_year(
+    year: int,
+    request: Request,
+    service: CalendarService = Depends(get_calendar_service)
+):
+    """Get all 300 dates of a year with the number of events on each day."""
+    if not 1 <= year <= calendar_math.MAX_YEAR:
+        raise HTTPException(status_code=400, detail=f"Year must be between 1 and {calendar_math.MAX_YEAR}")
+
+    # The counts change with the events, so the response is revalidated
+    # against the year's month versions rather than cached outright
+    versions = await service.get_year_versions(year)
+    headers = {}
+    if versions is not None:
+        etag = year_etag(year, versions)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        body = year_grid_cache.get((year, tuple(versions)))
+        if body is not None:
+            return Response(body, media_type="application/json", headers=headers)
+
+    try:
+        counts = await service.count_events_by_day(year)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Error counting events: {str(e)}")
+    body = year_grid_bytes(year, counts)
+    if versions is not None:
+        year_grid_cache.set((year, tuple(versions)), body)
+    return Response(body, media_type="application/json", headers=headers)
+
+@api_router.post("/calendar/convert", response_model=CalendarConvertResponse)
+async def convert_dates(request: CalendarConvertRequest):
+    """Convert Y-M-D dates to ordinals and ordinals to dates, in bulk."""
+    try:
+        parsed = [calendar_math.parse_date(value) for value in request.dates]
+        years, months, days = zip(*parsed) if parsed else ((), (), ())
+        date_ordinals = calendar_math.to_ordinal_batch(years, months, days)
+        return {
+            "dates": calendar_math.describe_batch(date_ordinals),
+            "ordinals": calendar_math.describe_batch(request.ordinals),
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@api_router.get("/calendar/diff", response_model=CalendarDiffResponse)
+async def diff_dates(
+    start: str = Query(..., alias="from", description="Start date as Y-M-D"),
+    end: str = Query(..., alias="to", description="End date as Y-M-D")
+):
+    """Number of days between two dates, also split into years, months and days."""
+    start_date = parse_custom_date(start)
+    end_date = parse_custom_date(end)
+    days = calendar_math.days_between(start_date, end_date)
+    years, remainder = divmod(abs(days), calendar_math.DAYS_PER_YEAR)
+    months, remaining_days = divmod(remainder, DAYS_PER_MONTH)
+    sign = -1 if days < 0 else 1
+    start_info, end_info = calendar_math.describe_batch([to_ordinal(*start_date), to_ordinal(*end_date)])
     return {
-        "year": year,
-        "month": month,
+        "start": start_info,
+        "end": end_info,
         "days": days,
-        "total_days": 30
+        "years": sign * years,
+        "months": sign * months,
+        "remaining_days": sign * remaining_days,
     }
 
 # Events endpoints
@@ -99,20 +344,138 @@ async def get_event(
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    return EventResponse(**event.dict())
+    return ORJSONResponse(event.dict())
+
+@api_router.get("/events/summary/{year}", response_model=EventYearSummary)
+async def get_year_summary(
+    year: int,
+    request: Request,
+    service: CalendarService = Depends(get_calendar_service)
+):
+    """Get the number of events of each type on every day of a year that has any."""
+    if not 1 <= year <= calendar_math.MAX_YEAR:
+        raise HTTPException(status_code=400, detail=f"Year must be between 1 and {calendar_math.MAX_YEAR}")
+
+    versions = await service.get_year_versions(year)
+    headers = {}
+    if versions is not None:
+        etag = year_etag(year, versions, "summary:")
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+    try:
+        summary = await service.get_year_summary(year)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Error summarizing events: {str(e)}")
+    return ORJSONResponse(summary.dict(), headers=headers)
 
-@api_router.get("/events/{year}/{month}", response_model=List[EventResponse])
+@api_router.get("/events/{year}/{month}", response_model=Union[List[EventResponse], EventPage])
 async def get_events_for_month(
     year: int,
     month: int,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; returns an EventPage"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     service: CalendarService = Depends(get_calendar_service)
 ):
-    """Get all events for a specific month."""
+    """Get all events for a specific month, or one page of them.
+
+    The month's version counter is sent as an ETag; a matching If-None-Match
+    gets a 304 without reading any events.
+    """
     if month < 0 or month > 9:
         raise HTTPException(status_code=400, detail="Month must be between 0 and 9")
-    
-    events = await service.get_events_for_month(year, month)
-    return [EventResponse(**event.dict()) for event in events]
+
+    # Read the version before the events so a concurrent write can only make
+    # the ETag older than the body, never newer
+    version = await service.get_month_version(year, month)
+    headers = {}
+    if version is not None:
+        etag = f'W/"{storage.version_epoch}{year}-{month}-{version}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+    if limit is not None or cursor is not None:
+        first, last = month_bounds(year, month)
+        return await event_page_response(
+            service, calendar_math.from_ordinal(first), calendar_math.from_ordinal(last),
+            limit, cursor, headers=headers
+        )
+
+    # Events were validated once when read from storage; dump the whole list
+    # in one call and skip response_model re-validation
+    try:
+        events = await service.get_events_for_month(year, month, version)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Error reading events: {str(e)}")
+    return ORJSONResponse(EventList.dump_python(events), headers=headers)
+
+@api_router.get("/events/range", response_model=Union[List[EventResponse], EventPage])
+async def get_events_in_range(
+    start: str = Query(..., alias="from", description="Start date as Y-M-D"),
+    end: str = Query(..., alias="to", description="End date as Y-M-D"),
+    type: Optional[str] = Query(None, description="Only return events of this type"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; returns an EventPage"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    service: CalendarService = Depends(get_calendar_service)
+):
+    """Get all events between two dates inclusive, streamed as a JSON array, or one page of them."""
+    start_date = parse_custom_date(start)
+    end_date = parse_custom_date(end)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+
+    if limit is not None or cursor is not None:
+        return await event_page_response(service, start_date, end_date, limit, cursor, type)
+
+    return await json_array_response(service.iter_events_in_range(start_date, end_date, type))
+
+@api_router.get("/events/search", response_model=EventSearchPage)
+async def search_events(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to look for in event notes"),
+    year: Optional[int] = Query(None, ge=1, description="Only return events in this year"),
+    type: Optional[str] = Query(None, description="Only return events of this type"),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    offset: int = Query(0, ge=0, description="next_offset of the previous page"),
+    service: CalendarService = Depends(get_calendar_service)
+):
+    """Search event notes, best matches first."""
+    try:
+        page = await service.search_events(q, limit, offset, year, type)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Error searching events: {str(e)}")
+    return ORJSONResponse(page.dict())
+
+@api_router.get("/events/changes", response_model=EventChanges)
+async def get_event_changes(
+    since: Optional[str] = Query(None, description="next_token of the previous response; omit for a full sync"),
+    limit: int = Query(500, ge=1, le=5000, description="Maximum number of changes"),
+    service: CalendarService = Depends(get_calendar_service)
+):
+    """Get the events created, updated or deleted after a change token."""
+    try:
+        changes = await service.get_changes(since, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ChangeTokenExpired:
+        raise HTTPException(status_code=410, detail="Deletions after this token have been pruned; sync again without since")
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Error reading changes: {str(e)}")
+    return ORJSONResponse(changes.dict())
+
+@api_router.get("/events/upcoming", response_model=List[EventResponse])
+async def get_upcoming_events(
+    days: int = Query(30, ge=1, le=3000, description="Number of days to look ahead, including today"),
+    type: Optional[str] = Query(None, description="Only return events of this type"),
+    service: CalendarService = Depends(get_calendar_service)
+):
+    """Get events from the current custom date over the next N days."""
+    current_date = await service.get_current_date() or DEFAULT_CURRENT_DATE
+    today = (current_date.year, current_date.month, current_date.day)
+    events = await service.get_upcoming_events(today, days, type)
+    return ORJSONResponse(EventList.dump_python(events))
 
 @api_router.post("/events", response_model=EventResponse)
 async def create_event(
@@ -122,10 +485,21 @@ async def create_event(
     """Create a new event."""
     try:
         event = await service.create_event(event_data)
-        return EventResponse(**event.dict())
+        return ORJSONResponse(event.dict())
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error creating event: {str(e)}")
 
+@api_router.post("/events/bulk", response_model=BulkEventResponse)
+async def bulk_events(
+    request: BulkEventRequest,
+    service: CalendarService = Depends(get_calendar_service)
+):
+    """Create, update and delete many events in one unordered batch write."""
+    try:
+        return await service.bulk_events(request.operations)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error applying bulk operations: {str(e)}")
+
 @api_router.put("/events/{event_id}", response_model=EventResponse)
 async def update_event(
     event_id: str,
@@ -137,7 +511,7 @@ async def update_event(
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    return EventResponse(**event.dict())
+    return ORJSONResponse(event.dict())
 
 @api_router.delete("/events/{event_id}")
 async def delete_event(
@@ -151,22 +525,230 @@ async def delete_event(
     
     return {"message": "Event deleted successfully"}
 
-# Utility function for custom day names
-def get_custom_day_name(day_index: int) -> str:
-    """Get custom day name from day index (0-9)."""
-    custom_days = [
-        'Peppermint Patty Day',
-        'Bing Bong Day', 
-        'Wednesday',
-        'Chewsday',
-        'Mustang Day',
-        'Second Wednesday',
-        'Skip Day', 
-        'Second Chewsday',
-        'Sabbath',
-        'Loin Cloth Day'
-    ]
-    return custom_days[day_index % 10]
+# Live change feed
+@api_router.get("/stream")
+async def stream_changes(service: CalendarService = Depends(get_calendar_service)):
+    """Server-Sent Events feed of event, recurrence and current-date changes."""
+    subscription = service.changes.subscribe()
+    return StreamingResponse(
+        service.changes.stream(subscription, heartbeat=STREAM_HEARTBEAT),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Recurrence endpoints
+@api_router.get("/recurrences", response_model=List[Recurrence])
+async def list_recurrences(service: CalendarService = Depends(get_calendar_service)):
+    """Get every recurrence rule."""
+    try:
+        rules = await service.list_recurrences()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Error reading recurrences: {str(e)}")
+    return ORJSONResponse([rule.dict() for rule in rules])
+
+@api_router.post("/recurrences", response_model=Recurrence)
+async def create_recurrence(
+    rule_data: RecurrenceCreate,
+    service: CalendarService = Depends(get_calendar_service)
+):
+    """Create a recurrence rule."""
+    try:
+        rule = await service.create_recurrence(rule_data)
+        return ORJSONResponse(rule.dict())
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error creating recurrence: {str(e)}")
+
+@api_router.get("/recurrences/{rule_id}", response_model=Recurrence)
+async def get_recurrence(
+    rule_id: str,
+    service: CalendarService = Depends(get_calendar_service)
+):
+    """Get a specific recurrence rule."""
+    rule = await service.get_recurrence(rule_id)
+    if not rule:
+        raise HTTPException(status_code=404, detail="Recurrence not found")
+    return ORJSONResponse(rule.dict())
+
+@api_router.delete("/recurrences/{rule_id}")
+async def delete_recurrence(
+    rule_id: str,
+    service: CalendarService = Depends(get_calendar_service)
+):
+    """Delete a recurrence rule and all of its occurrences."""
+    success = await service.delete_recurrence(rule_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Recurrence not found")
+    
+    return {"message": "Recurrence deleted successfully"}
+
+# Backup endpoints
+@api_router.get("/export")
+async def export_events(service: CalendarService = Depends(get_calendar_service)):
+    """Stream every event and recurrence rule as newline-delimited JSON."""
+    return StreamingResponse(
+        service.export_events(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="events.ndjson"'}
+    )
+
+@api_router.post("/import", response_model=EventImportResult)
+async def import_events(
+    request: Request,
+    service: CalendarService = Depends(get_calendar_service)
+):
+    """Import newline-delimited JSON events and recurrence rules from the request body."""
+    try:
+        return await service.import_events(iter_lines(request.stream()))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error importing events: {str(e)}")
+
+# Diagnostics endpoints
+@api_router.get("/diagnostics/indexes")
+async def get_index_diagnostics(request: Request):
+    """Report index status and the query plans used by the calendar service."""
+    await wait_for_storage(request.app)
+    try:
+        return await storage.diagnostics()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Error reading index diagnostics: {str(e)}")
+
+@api_router.get("/diagnostics/cache")
+async def get_cache_diagnostics(service: CalendarService = Depends(get_calendar_service)):
+    """Report month event cache and read coalescing counters."""
+    return {
+        "month_events": service.month_cache.stats(),
+        "single_flight": service.flights.stats(),
+        "stream": service.changes.stats(),
+    }
+
+@api_router.get("/diagnostics/pool")
+async def get_pool_diagnostics():
+    """Report database connection pool counters and settings."""
+    return {"engine": storage.name, "pool": storage.pool_stats()}
+
+@api_router.get("/diagnostics/startup")
+async def get_startup_diagnostics():
+    """Report how long the startup phases after import took."""
+    return {"engine": storage.name, **startup_timings}
+
+@api_router.get("/health/ready")
+async def get_readiness(request: Request):
+    """Whether the database answers a ping; the result is cached for READY_CACHE_TTL seconds."""
+    ready = getattr(request.app.state, "storage_ready", None)
+    if ready is not None and not ready.done():
+        if request.app.state.storage_error:
+            return ORJSONResponse(
+                {"status": "unavailable", "engine": storage.name, "detail": request.app.state.storage_error},
+                status_code=503
+            )
+        return ORJSONResponse({"status": "starting", "engine": storage.name}, status_code=503)
+    error = readiness_cache.get("ready")
+    if error is None:
+        error = await readiness_flight.do("ready", check_storage)
+        readiness_cache.set("ready", error)
+    if error:
+        return ORJSONResponse({"status": "unavailable", "engine": storage.name, "detail": error}, status_code=503)
+    return {"status": "ready", "engine": storage.name}
+
+async def check_storage() -> str:
+    """Ping the database; return an error description, or "" if it answered."""
+    try:
+        await asyncio.wait_for(storage.ping(), READY_TIMEOUT)
+        return ""
+    except asyncio.TimeoutError:
+        return f"No answer within {READY_TIMEOUT} s"
+    except Exception as e:
+        return str(e)
+
+@api_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Latency histograms and cache counters in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# Utility functions for date parameters and streamed responses
+def parse_custom_date(value: str) -> CustomDate:
+    """Parse a Y-M-D custom date (month 0-9, day 1-30) from a query parameter."""
+    try:
+        return calendar_math.parse_date(value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def event_page_response(
+    service: CalendarService,
+    start: CustomDate,
+    end: CustomDate,
+    limit: Optional[int],
+    cursor: Optional[str],
+    event_type: Optional[str] = None,
+    headers: Optional[dict] = None,
+) -> Response:
+    """Serialize one EventPage of the events between two dates."""
+    limit = limit or DEFAULT_PAGE_SIZE
+    try:
+        events, next_cursor = await service.get_events_page(start, end, limit, cursor, event_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ORJSONResponse(
+        {"events": EventList.dump_python(events), "limit": limit, "next_cursor": next_cursor},
+        headers=headers
+    )
+
+STREAM_BATCH_SIZE = 200
+
+async def json_array_response(events: AsyncIterator[Event]) -> Response:
+    """Respond with events as a JSON array, streamed if there is more than one batch.
+
+    The first batch is read before the response starts, so a failing query
+    still gets an error status instead of a 200 with a truncated body.
+    """
+    first_batch = []
+    try:
+        async for event in events:
+            first_batch.append(event)
+            if len(first_batch) >= STREAM_BATCH_SIZE:
+                break
+        else:
+            return ORJSONResponse(EventList.dump_python(first_batch))
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Error reading events: {str(e)}")
+    return StreamingResponse(stream_json_array(events, first_batch), media_type="application/json")
+
+async def stream_json_array(events: AsyncIterator[Event], first_batch: List[Event]) -> AsyncIterator[str]:
+    """Serialize events as a JSON array in batches instead of one large list."""
+    yield "[" + ",".join(orjson.dumps(event.dict()).decode() for event in first_batch)
+    batch = []
+    first = not first_batch
+    async for event in events:
+        batch.append(orjson.dumps(event.dict()).decode())
+        if len(batch) >= STREAM_BATCH_SIZE:
+            yield ("" if first else ",") + ",".join(batch)
+            first = False
+            batch = []
+    if batch:
+        yield ("" if first else ",") + ",".join(batch)
+    yield "]"
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a streamed body into lines without reading it all into memory."""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8")
+    if pending:
+        yield pending.decode("utf-8")
+
+def year_etag(year: int, versions: List[int], kind: str = "") -> str:
+    """Weak ETag for a per-year response, built from all ten month versions."""
+    return f'W/"{kind}{storage.version_epoch}{year}-{".".join(map(str, versions))}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches the current ETag."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -178,20 +760,19 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Request-ID"],
 )
 
+# Outermost, so request latency includes CORS handling and every log line
+# written for a request carries its ID
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(tracing.RequestIdMiddleware)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
 )
+for handler in logging.getLogger().handlers:
+    handler.addFilter(tracing.RequestIdFilter())
 logger = logging.getLogger(__name__)
-
-@app.on_event("startup")
-async def startup_event():
-    logger.info("Custom Calendar API started successfully")
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
-    logger.info("Database connection closed")
\ No newline at end of file
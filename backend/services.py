@@ -1,71 +1,420 @@
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from models import CurrentDate, CurrentDateCreate, Event, EventCreate, EventUpdate
-from typing import Optional, List
-from datetime import datetime
+from models import (
+    BulkEventOperation, BulkEventResponse, BulkEventResult,
+    CurrentDate, CurrentDateCreate, Event, EventChanges, EventCreate, EventDaySummary, EventImport, EventImportResult,
+    EventList, EventTombstone,
+    EventSearchHit, EventSearchPage, EventUpdate, EventYearSummary, Recurrence, RecurrenceCreate, RecurrenceImport,
+)
+from pydantic import ValidationError
+from typing import AsyncIterator, Dict, Optional, List, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import base64
+import heapq
 import logging
+import orjson
+import time
+
+from broadcast import Broadcaster
+from cache import LRUCache, SingleFlight
+from calendar_math import from_ordinal, month_bounds, to_ordinal, year_bounds
+from metrics import timed
+from recurrence import expand_rules
+from storage import ChangeKey, CustomDate, PageKey, StorageEngine
 
 logger = logging.getLogger(__name__)
 
+# Events per NDJSON export chunk and per insert_many call on import
+TRANSFER_BATCH_SIZE = 500
+# Stored fields of a recurrence rule that are derived from the others
+RECURRENCE_DERIVED_FIELDS = {"start_ordinal", "end_ordinal"}
+# Invalid import lines reported back individually
+MAX_IMPORT_ERRORS = 20
+
+def encode_cursor(key: PageKey) -> str:
+    """Opaque pagination cursor for the (ordinal, created_at, id) of an event."""
+    ordinal, created_at, event_id = key
+    return base64.urlsafe_b64encode(orjson.dumps([ordinal, created_at.isoformat(), event_id])).decode()
+
+def _page_key(doc: dict) -> PageKey:
+    return doc['ordinal'], doc['created_at'], doc['id']
+
+def decode_cursor(cursor: str) -> PageKey:
+    """Inverse of encode_cursor; raises ValueError for a malformed cursor."""
+    try:
+        ordinal, created_at, event_id = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(ordinal), datetime.fromisoformat(created_at), str(event_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def encode_change_token(key: Optional[ChangeKey], recurrences_version: int) -> str:
+    """Opaque change feed token for the (timestamp, id) of the last change seen, if any,
+    and the recurrence rules version at the time."""
+    changed_at, doc_id = key or (None, None)
+    return base64.urlsafe_b64encode(orjson.dumps([
+        changed_at.isoformat() if changed_at else None, doc_id, recurrences_version
+    ])).decode()
+
+def decode_change_token(token: str) -> Tuple[Optional[ChangeKey], Optional[int]]:
+    """Inverse of encode_change_token; raises ValueError for a malformed token.
+
+    Tokens from before the rules version was included decode with a version of None.
+    """
+    try:
+        changed_at, doc_id, *rest = orjson.loads(base64.urlsafe_b64decode(token.encode()))
+        key = (datetime.fromisoformat(changed_at), str(doc_id)) if changed_at is not None else None
+        return key, int(rest[0]) if rest else None
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid token: {token}") from e
+
+class ChangeTokenExpired(Exception):
+    """The token predates a pruned tombstone, so deletions may be missing."""
+
 class CalendarService:
-    def __init__(self, db: AsyncIOMotorDatabase):
-        self.db = db
-        self.current_date_collection = db.current_date
-        self.events_collection = db.events
+    def __init__(
+        self,
+        storage: StorageEngine,
+        current_date_ttl: float = 5.0,
+        month_cache_size: int = 256,
+        stream_queue_size: int = 100,
+        tombstone_retention_days: float = 30.0,
+    ):
+        self.storage = storage
+        # (month version, event list) per month. An entry is only served for
+        # the version it was read at, so writes by other worker processes are
+        # seen as soon as they bump the version; no TTL is needed.
+        self.month_cache = LRUCache(maxsize=month_cache_size, ttl=float("inf"))
+        # The current date is read on every page load but rarely written, so it
+        # is served from memory. Writes through this service refresh the cache;
+        # the TTL bounds staleness when another worker process writes.
+        self.current_date_ttl = current_date_ttl
+        self._current_date: Optional[CurrentDate] = None
+        self._current_date_expires = 0.0
+        self._current_date_generation = 0
+        self._current_date_lock = asyncio.Lock()
+        # Concurrent identical reads share one storage query
+        self.flights = SingleFlight()
+        # Deletions stay visible to the change feed for this long
+        self.tombstone_retention = timedelta(days=tombstone_retention_days)
+        # Writes are announced to /api/stream subscribers
+        self.changes = Broadcaster(queue_size=stream_queue_size)
+
+    def _cache_current_date(self, current_date: CurrentDate, generation: Optional[int] = None) -> CurrentDate:
+        # A read that started before a write must not overwrite the written date
+        if generation is None or generation == self._current_date_generation:
+            self._current_date = current_date
+            self._current_date_expires = time.monotonic() + self.current_date_ttl
+        return current_date
+
+    def invalidate_current_date(self) -> None:
+        self._current_date_generation += 1
+        self._current_date = None
+        self.flights.forget(("current_date",))
+
+    def _invalidate_month(self, year: int, month: int) -> None:
+        self.month_cache.invalidate((year, month))
+        self.flights.forget_matching(lambda key: key[:3] == ("month", year, month))
+
+    def _invalidate_all_months(self) -> None:
+        self.month_cache.clear()
+        self.flights.forget_matching(lambda key: key[0] == "month")
+
+    async def _load_current_date(self) -> Optional[CurrentDate]:
+        generation = self._current_date_generation
+        doc = await self.storage.get_current_date()
+        if doc:
+            return self._cache_current_date(CurrentDate(**doc), generation)
+        return None
+
+    async def _occurrences(
+        self, start_ordinal: int, end_ordinal: int, event_type: Optional[str] = None
+    ) -> List[dict]:
+        """Occurrences of the recurrence rules between two ordinals inclusive."""
+        rules = await self.storage.find_recurrences(start_ordinal, end_ordinal)
+        return expand_rules(rules, start_ordinal, end_ordinal, event_type)
 
+    async def _load_month(self, year: int, month: int, version: Optional[int]) -> List[Event]:
+        token = self.month_cache.fill_token()
+        docs, occurrences = await asyncio.gather(
+            self.storage.find_events_for_month(year, month),
+            self._occurrences(*month_bounds(year, month))
+        )
+        if occurrences:
+            docs = list(heapq.merge(docs, occurrences, key=lambda doc: doc['day']))
+        events = EventList.validate_python(docs)
+        # The version was read before the events, so a concurrent write can
+        # only make the entry's version older than its list, never newer
+        if version is not None:
+            self.month_cache.set((year, month), (version, events), token=token)
+        return events
+
+    @timed
     async def get_current_date(self) -> Optional[CurrentDate]:
         """Get the current custom date."""
+        if self._current_date is not None and time.monotonic() < self._current_date_expires:
+            return self._current_date
         try:
-            doc = await self.current_date_collection.find_one({})
-            if doc:
-                doc['id'] = str(doc['_id'])
-                return CurrentDate(**doc)
-            return None
+            return await self.flights.do(("current_date",), self._load_current_date)
         except Exception as e:
             logger.error(f"Error getting current date: {e}")
             return None
 
+    @timed
     async def set_current_date(self, date_data: CurrentDateCreate) -> CurrentDate:
         """Set/update the current custom date."""
         try:
             current_date = CurrentDate(**date_data.dict())
-            
-            # Replace the single current date document
-            await self.current_date_collection.delete_many({})
-            result = await self.current_date_collection.insert_one(current_date.dict())
-            
-            current_date.id = str(result.inserted_id)
+            # Serialize writers so the cache ends up holding the last stored date
+            async with self._current_date_lock:
+                self.invalidate_current_date()
+                doc = await self.storage.set_current_date(current_date.dict())
+                current_date = self._cache_current_date(CurrentDate(**doc))
+            self.changes.publish("current_date.updated", current_date.dict())
             return current_date
         except Exception as e:
             logger.error(f"Error setting current date: {e}")
             raise
 
-    async def get_events_for_month(self, year: int, month: int) -> List[Event]:
-        """Get all events for a specific month."""
+    @timed
+    async def get_or_create_current_date(self, default: CurrentDateCreate) -> CurrentDate:
+        """Get the current date, storing ``default`` only if none has been set."""
+        current_date = await self.get_current_date()
+        if current_date:
+            return current_date
         try:
-            cursor = self.events_collection.find({"year": year, "month": month})
-            events = []
-            async for doc in cursor:
-                doc['id'] = str(doc['_id'])
-                events.append(Event(**doc))
-            return events
+            async with self._current_date_lock:
+                doc = await self.storage.init_current_date(CurrentDate(**default.dict()).dict())
+                return self._cache_current_date(CurrentDate(**doc))
+        except Exception as e:
+            logger.error(f"Error creating default current date: {e}")
+            raise
+
+    @timed
+    async def advance_current_date(self, days: int, default: CurrentDateCreate) -> Tuple[CustomDate, CurrentDate]:
+        """Move the current date ``days`` days forward; return the previous and new dates.
+
+        The storage engine computes the new date from the stored one in one
+        atomic write, so concurrent advances are never lost.
+        """
+        await self.get_or_create_current_date(default)
+        try:
+            async with self._current_date_lock:
+                self.invalidate_current_date()
+                doc = await self.storage.advance_current_date(days, datetime.utcnow())
+                if doc is None:
+                    raise ValueError("No current date is set")
+                current_date = self._cache_current_date(CurrentDate(**doc))
+        except Exception as e:
+            logger.error(f"Error advancing current date by {days} days: {e}")
+            raise
+        self.changes.publish("current_date.updated", current_date.dict())
+        ordinal = to_ordinal(current_date.year, current_date.month, current_date.day)
+        return from_ordinal(ordinal - days), current_date
+
+    @timed
+    async def get_events_for_month(self, year: int, month: int, version: Optional[int] = None) -> List[Event]:
+        """Get all events for a specific month.
+
+        ``version`` is the get_month_version() the caller already read, if
+        any; the cached list is only used if it was read at that version.
+        """
+        try:
+            if version is None:
+                version = await self.get_month_version(year, month)
+            cached = self.month_cache.get((year, month))
+            if cached is not None and version is not None and cached[0] == version:
+                return list(cached[1])
+            events = await self.flights.do(
+                ("month", year, month, version), lambda: self._load_month(year, month, version)
+            )
+            return list(events)
         except Exception as e:
             logger.error(f"Error getting events for {year}/{month}: {e}")
-            return []
+            raise
+
+    @timed
+    async def get_month_version(self, year: int, month: int) -> Optional[int]:
+        """Get a version that every write to the month's events or to a recurrence rule bumps.
+
+        Both counters only ever increase, so their sum changes on every write.
+        """
+        try:
+            version, recurrences_version = await asyncio.gather(
+                self.storage.get_month_version(year, month), self.storage.get_recurrences_version()
+            )
+            return version + recurrences_version
+        except Exception as e:
+            logger.error(f"Error getting version for {year}/{month}: {e}")
+            return None
+
+    @timed
+    async def get_year_versions(self, year: int) -> Optional[List[int]]:
+        """Get the version counters of all ten months of a year."""
+        try:
+            versions, recurrences_version = await asyncio.gather(
+                self.storage.get_month_versions(year), self.storage.get_recurrences_version()
+            )
+            return [version + recurrences_version for version in versions]
+        except Exception as e:
+            logger.error(f"Error getting versions for {year}: {e}")
+            return None
+
+    @timed
+    async def count_events_by_day(self, year: int) -> Dict[Tuple[int, int], int]:
+        """Get the number of events on each (month, day) of a year."""
+        try:
+            counts, occurrences = await asyncio.gather(
+                self.storage.count_events_by_day(year), self._occurrences(*year_bounds(year))
+            )
+            for doc in occurrences:
+                counts[(doc['month'], doc['day'])] = counts.get((doc['month'], doc['day']), 0) + 1
+            return counts
+        except Exception as e:
+            logger.error(f"Error counting events for {year}: {e}")
+            raise
+
+    @timed
+    async def get_year_summary(self, year: int) -> EventYearSummary:
+        """Per-day event counts by type for a year, without reading any notes."""
+        try:
+            counts, occurrences = await asyncio.gather(
+                self.storage.count_events_by_type(year), self._occurrences(*year_bounds(year))
+            )
+        except Exception as e:
+            logger.error(f"Error summarizing events for {year}: {e}")
+            raise
+        for doc in occurrences:
+            key = (doc['month'], doc['day'], doc['type'])
+            counts[key] = counts.get(key, 0) + 1
+        days: Dict[Tuple[int, int], Dict[str, int]] = {}
+        for (month, day, event_type), count in sorted(counts.items()):
+            days.setdefault((month, day), {})[event_type] = count
+        return EventYearSummary(
+            year=year,
+            total=sum(counts.values()),
+            days=[
+                EventDaySummary(month=month, day=day, total=sum(types.values()), types=types)
+                for (month, day), types in days.items()
+            ]
+        )
+
+    @timed
+    async def iter_events_in_range(
+        self, start: CustomDate, end: CustomDate, event_type: Optional[str] = None
+    ) -> AsyncIterator[Event]:
+        """Stream all events between two (year, month, day) dates inclusive."""
+        try:
+            start_ordinal, end_ordinal = to_ordinal(*start), to_ordinal(*end)
+            occurrences = await self._occurrences(start_ordinal, end_ordinal, event_type)
+            next_occurrence = 0
+            # Validate in batches rather than one model at a time
+            batch = []
+            async for doc in self.storage.iter_events_between(start_ordinal, end_ordinal, event_type):
+                # Interleave the occurrences that come before this event
+                while next_occurrence < len(occurrences) and occurrences[next_occurrence]['ordinal'] < doc['ordinal']:
+                    batch.append(occurrences[next_occurrence])
+                    next_occurrence += 1
+                batch.append(doc)
+                if len(batch) >= TRANSFER_BATCH_SIZE:
+                    for event in EventList.validate_python(batch):
+                        yield event
+                    batch = []
+            batch.extend(occurrences[next_occurrence:])
+            for event in EventList.validate_python(batch):
+                yield event
+        except Exception as e:
+            logger.error(f"Error getting events for range {start} to {end}: {e}")
+            raise
+
+    @timed
+    async def get_events_page(
+        self,
+        start: CustomDate,
+        end: CustomDate,
+        limit: int,
+        cursor: Optional[str] = None,
+        event_type: Optional[str] = None,
+    ) -> Tuple[List[Event], Optional[str]]:
+        """One page of events between two dates, and the cursor of the next page.
 
+        Pages are read by seeking past the cursor's (ordinal, created_at, id)
+        key, so every page costs the same however deep it is.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        start_ordinal, end_ordinal = to_ordinal(*start), to_ordinal(*end)
+        try:
+            # One extra event tells whether there is a next page
+            docs, occurrences = await asyncio.gather(
+                self.storage.find_events_page(start_ordinal, end_ordinal, limit + 1, after, event_type),
+                self._occurrences(start_ordinal, end_ordinal, event_type)
+            )
+            if occurrences:
+                if after is not None:
+                    occurrences = [doc for doc in occurrences if _page_key(doc) > after]
+                docs = heapq.merge(docs, occurrences[:limit + 1], key=_page_key)
+                docs = list(docs)[:limit + 1]
+            events = EventList.validate_python(docs[:limit])
+        except Exception as e:
+            logger.error(f"Error getting events page for {start} to {end}: {e}")
+            raise
+        if len(docs) <= limit:
+            return events, None
+        last = events[-1]
+        return events, encode_cursor((last.ordinal, last.created_at, last.id))
+
+    @timed
+    async def search_events(
+        self,
+        query: str,
+        limit: int,
+        offset: int = 0,
+        year: Optional[int] = None,
+        event_type: Optional[str] = None,
+    ) -> EventSearchPage:
+        """Events whose note matches words of ``query``, ranked by relevance."""
+        try:
+            # One extra hit tells whether there is a next page
+            hits = await self.storage.search_events(query, limit + 1, offset, year, event_type)
+            events = EventList.validate_python([doc for doc, _ in hits[:limit]])
+        except Exception as e:
+            logger.error(f"Error searching events for '{query}': {e}")
+            raise
+        return EventSearchPage(
+            query=query,
+            events=[EventSearchHit(**event.dict(), score=score) for event, (_, score) in zip(events, hits)],
+            limit=limit,
+            offset=offset,
+            next_offset=offset + limit if len(hits) > limit else None
+        )
+
+    @timed
+    async def get_events_between(
+        self, start: CustomDate, end: CustomDate, event_type: Optional[str] = None
+    ) -> List[Event]:
+        """Get all events between two (year, month, day) dates inclusive."""
+        return [event async for event in self.iter_events_in_range(start, end, event_type)]
+
+    @timed
+    async def get_upcoming_events(
+        self, today: CustomDate, days: int, event_type: Optional[str] = None
+    ) -> List[Event]:
+        """Get events from today through the following ``days - 1`` days."""
+        start = to_ordinal(*today)
+        return await self.get_events_between(from_ordinal(start), from_ordinal(start + days - 1), event_type)
+
+    @timed
     async def create_event(self, event_data: EventCreate) -> Event:
         """Create a new event."""
         try:
             event = Event(**event_data.dict())
-            # Store the original UUID before insertion
-            original_id = event.id
-            result = await self.events_collection.insert_one(event.dict())
-            # Keep the original UUID as the event ID, not the ObjectId
-            event.id = original_id
+            await self.storage.insert_event({**event.dict(), "changed_at": event.updated_at})
+            self._invalidate_month(event.year, event.month)
+            self.changes.publish("event.created", event.dict())
             return event
         except Exception as e:
             logger.error(f"Error creating event: {e}")
             raise
 
+    @timed
     async def update_event(self, event_id: str, event_data: EventUpdate) -> Optional[Event]:
         """Update an existing event."""
         try:
@@ -73,39 +422,311 @@ class CalendarService:
             if not update_data:
                 return None
             
-            update_data['updated_at'] = datetime.utcnow()
+            update_data['updated_at'] = update_data['changed_at'] = datetime.utcnow()
             
-            result = await self.events_collection.find_one_and_update(
-                {"id": event_id},
-                {"$set": update_data},
-                return_document=True
-            )
-            
-            if result:
-                result['id'] = str(result['_id']) if 'id' not in result else result['id']
-                return Event(**result)
+            doc = await self.storage.update_event(event_id, update_data)
+            self.flights.forget(("event", event_id))
+            if doc:
+                self._invalidate_month(doc['year'], doc['month'])
+                event = Event(**doc)
+                self.changes.publish("event.updated", event.dict())
+                return event
             return None
         except Exception as e:
             logger.error(f"Error updating event {event_id}: {e}")
             return None
 
+    @timed
     async def delete_event(self, event_id: str) -> bool:
         """Delete an event."""
         try:
-            result = await self.events_collection.delete_one({"id": event_id})
-            return result.deleted_count > 0
+            deleted = await self.storage.delete_event(event_id)
+            self.flights.forget(("event", event_id))
+            if deleted is None:
+                return False
+            self._invalidate_month(deleted['year'], deleted['month'])
+            await self._record_deletions([event_id])
+            self.changes.publish("event.deleted", {"id": event_id, **deleted})
+            return True
         except Exception as e:
             logger.error(f"Error deleting event {event_id}: {e}")
             return False
 
+    async def _record_deletions(self, event_ids: List[str]) -> None:
+        """Leave tombstones for deleted events and drop those past retention."""
+        now = datetime.utcnow()
+        try:
+            await self.storage.insert_tombstones([{"id": event_id, "deleted_at": now} for event_id in event_ids])
+            await self.storage.prune_tombstones(now - self.tombstone_retention)
+        except Exception as e:
+            # The events are gone either way; only delta sync misses them
+            logger.error(f"Error recording tombstones for {len(event_ids)} deleted events: {e}")
+
+    @timed
+    async def get_changes(self, since: Optional[str], limit: int) -> EventChanges:
+        """Events written or deleted after a change token, oldest first by write time.
+
+        Without a token this starts from the beginning: every event plus the
+        retained tombstones. Occurrences are not listed; ``recurrences_changed``
+        tells the client to reload the rules. Raises ValueError for a malformed
+        token and ChangeTokenExpired when a tombstone after it has been pruned.
+        """
+        after, since_recurrences_version = decode_change_token(since) if since else (None, None)
+        try:
+            # limit + 1 of each tells whether there are more changes
+            docs, tombstones, recurrences_version = await asyncio.gather(
+                self.storage.find_changed_events(after, limit + 1),
+                self.storage.find_tombstones(after, limit + 1),
+                self.storage.get_recurrences_version()
+            )
+            # Read after the tombstones: pruning moves the horizon before it
+            # deletes, so any tombstone missing above has been counted
+            horizon = await self.storage.get_tombstone_horizon() if after is not None else None
+        except Exception as e:
+            logger.error(f"Error getting changes since {since}: {e}")
+            raise
+        if horizon is not None and after < horizon:
+            raise ChangeTokenExpired(since)
+        changes = list(heapq.merge(
+            ((doc['changed_at'], doc['id'], doc, True) for doc in docs),
+            ((doc['deleted_at'], doc['id'], doc, False) for doc in tombstones),
+            key=lambda change: change[:2]
+        ))
+        page = changes[:limit]
+        return EventChanges(
+            events=EventList.validate_python([doc for _, _, doc, is_event in page if is_event]),
+            deleted=[EventTombstone(**doc) for _, _, doc, is_event in page if not is_event],
+            next_token=encode_change_token(page[-1][:2] if page else after, recurrences_version),
+            has_more=len(changes) > limit,
+            recurrences_changed=recurrences_version != since_recurrences_version
+        )
+
+    @timed
+    async def list_recurrences(self) -> List[Recurrence]:
+        """Get every recurrence rule."""
+        try:
+            return [Recurrence(**doc) for doc in await self.storage.find_recurrences()]
+        except Exception as e:
+            logger.error(f"Error listing recurrences: {e}")
+            raise
+
+    @timed
+    async def get_recurrence(self, rule_id: str) -> Optional[Recurrence]:
+        """Get a specific recurrence rule by ID."""
+        try:
+            doc = await self.storage.find_recurrence(rule_id)
+            return Recurrence(**doc) if doc else None
+        except Exception as e:
+            logger.error(f"Error getting recurrence {rule_id}: {e}")
+            return None
+
+    @timed
+    async def create_recurrence(self, rule_data: RecurrenceCreate) -> Recurrence:
+        """Create a recurrence rule; its occurrences appear in every month it touches."""
+        try:
+            rule = Recurrence(**rule_data.dict())
+            await self.storage.insert_recurrence(rule.dict())
+            self._invalidate_all_months()
+            self.changes.publish("recurrence.created", rule.dict())
+            return rule
+        except Exception as e:
+            logger.error(f"Error creating recurrence: {e}")
+            raise
+
+    @timed
+    async def delete_recurrence(self, rule_id: str) -> bool:
+        """Delete a recurrence rule and with it all of its occurrences."""
+        try:
+            deleted = await self.storage.delete_recurrence(rule_id)
+            if deleted:
+                self._invalidate_all_months()
+                self.changes.publish("recurrence.deleted", {"id": rule_id})
+            return deleted
+        except Exception as e:
+            logger.error(f"Error deleting recurrence {rule_id}: {e}")
+            return False
+
+    @timed
     async def get_event_by_id(self, event_id: str) -> Optional[Event]:
         """Get a specific event by ID."""
         try:
-            doc = await self.events_collection.find_one({"id": event_id})
+            doc = await self.flights.do(("event", event_id), lambda: self.storage.find_event(event_id))
             if doc:
-                doc['id'] = str(doc['_id']) if 'id' not in doc else doc['id']
                 return Event(**doc)
             return None
         except Exception as e:
             logger.error(f"Error getting event {event_id}: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    @timed
+    async def bulk_events(self, operations: List[BulkEventOperation]) -> BulkEventResponse:
+        """Validate and apply a mixed batch of create/update/delete operations in one write."""
+        results: List[Optional[BulkEventResult]] = [None] * len(operations)
+        writes = []
+        write_indexes = []
+        # Event id -> index of the operation targeting it; the batch is
+        # unordered, so a second operation on the same id has no defined result
+        targeted: Dict[str, int] = {}
+        now = datetime.utcnow()
+
+        for index, operation in enumerate(operations):
+            try:
+                if operation.op == "create":
+                    event = Event(**EventCreate(**(operation.data or {})).dict())
+                    writes.append({"op": "create", "doc": {**event.dict(), "changed_at": now}})
+                    results[index] = BulkEventResult(index=index, op=operation.op, id=event.id, status="pending")
+                elif operation.op in ("update", "delete"):
+                    if not operation.id:
+                        raise ValueError(f"id is required for {operation.op}")
+                    if operation.id in targeted:
+                        raise ValueError(f"id is already targeted by operation {targeted[operation.id]}")
+                    write = {"op": operation.op, "id": operation.id}
+                    if operation.op == "update":
+                        fields = {k: v for k, v in EventUpdate(**(operation.data or {})).dict().items() if v is not None}
+                        if not fields:
+                            raise ValueError("No fields to update")
+                        write["fields"] = {**fields, "updated_at": now, "changed_at": now}
+                    writes.append(write)
+                    targeted[operation.id] = index
+                    results[index] = BulkEventResult(index=index, op=operation.op, id=operation.id, status="pending")
+                else:
+                    raise ValueError("op must be one of: create, update, delete")
+                write_indexes.append(index)
+            except (ValidationError, ValueError) as e:
+                error = "; ".join(err["msg"] for err in e.errors()) if isinstance(e, ValidationError) else str(e)
+                results[index] = BulkEventResult(
+                    index=index, op=operation.op, id=operation.id, status="error", error=error
+                )
+
+        if writes:
+            try:
+                outcomes = await self.storage.bulk_write(writes)
+            except Exception as e:
+                logger.error(f"Error applying bulk event operations: {e}")
+                raise
+            for index, write, (status, error) in zip(write_indexes, writes, outcomes):
+                results[index].status = status
+                results[index].error = error
+                if status == "created":
+                    self.changes.publish("event.created", write["doc"])
+                elif status in ("updated", "deleted"):
+                    # Bulk updates and deletes only know the event id
+                    self.changes.publish(f"event.{status}", {"id": write["id"]})
+            deleted_ids = [
+                write["id"] for write, (status, _) in zip(writes, outcomes) if status == "deleted"
+            ]
+            if deleted_ids:
+                await self._record_deletions(deleted_ids)
+            # Only creates carry their month; updates and deletes are by id
+            if any(write["op"] != "create" for write in writes):
+                self._invalidate_all_months()
+                self.flights.forget_matching(lambda key: key[0] == "event")
+            else:
+                for write in writes:
+                    self._invalidate_month(write["doc"]["year"], write["doc"]["month"])
+
+        counts = {
+            status: sum(1 for result in results if result.status == status)
+            for status in ("created", "updated", "deleted")
+        }
+        return BulkEventResponse(
+            results=results,
+            failed=len(results) - sum(counts.values()),
+            **counts
+        )
+
+    @timed
+    async def export_events(self, batch_size: int = TRANSFER_BATCH_SIZE) -> AsyncIterator[str]:
+        """Stream every event, then every recurrence rule, as NDJSON tagged with its ``kind``.
+
+        Events come in one chunk of lines per storage batch, rules in one final chunk.
+        """
+        try:
+            async for docs in self.storage.iter_event_batches(batch_size):
+                events = EventList.dump_python(EventList.validate_python(docs))
+                yield "".join(orjson.dumps({"kind": "event", **event}).decode() + "\n" for event in events)
+            rules = [Recurrence(**doc).dict(exclude=RECURRENCE_DERIVED_FIELDS) for doc in await self.storage.find_recurrences()]
+            if rules:
+                yield "".join(orjson.dumps({"kind": "recurrence", **rule}).decode() + "\n" for rule in rules)
+        except Exception as e:
+            logger.error(f"Error exporting events: {e}")
+            raise
+
+    @timed
+    async def import_events(
+        self, lines: AsyncIterator[str], batch_size: int = TRANSFER_BATCH_SIZE
+    ) -> EventImportResult:
+        """Insert events and recurrence rules from NDJSON lines in batches, skipping ids that already exist.
+
+        Lines without a ``kind`` are events, so exports from before rules were
+        included still import.
+        """
+        result = EventImportResult()
+        batch = []
+        rules = []
+
+        async def flush():
+            # Imported events keep their updated_at; changed_at is the time of
+            # the import, so the change feed lists them after earlier tokens
+            changed_at = datetime.utcnow()
+            inserted = await self.storage.insert_many([{**doc, "changed_at": changed_at} for doc in batch])
+            for year, month in {(doc['year'], doc['month']) for doc in batch}:
+                self._invalidate_month(year, month)
+            result.inserted += inserted
+            result.skipped += len(batch) - inserted
+            if inserted:
+                self.changes.publish("events.imported", {
+                    "inserted": inserted,
+                    "months": sorted({(doc['year'], doc['month']) for doc in batch}),
+                })
+            batch.clear()
+
+        async def flush_rules():
+            inserted = await self.storage.insert_recurrences(rules)
+            result.recurrences_inserted += inserted
+            result.recurrences_skipped += len(rules) - inserted
+            if inserted:
+                self._invalidate_all_months()
+                self.changes.publish("recurrences.imported", {"inserted": inserted})
+            rules.clear()
+
+        def reject(line_number: int, message: str):
+            result.invalid += 1
+            if len(result.errors) < MAX_IMPORT_ERRORS:
+                result.errors.append(f"line {line_number}: {message}")
+
+        try:
+            line_number = 0
+            async for line in lines:
+                line_number += 1
+                if not line.strip():
+                    continue
+                try:
+                    data = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    reject(line_number, "Invalid JSON")
+                    continue
+                kind = data.pop("kind", "event") if isinstance(data, dict) else "event"
+                try:
+                    if kind == "event":
+                        batch.append(Event(**EventImport.parse_obj(data).dict()).dict())
+                    elif kind == "recurrence":
+                        rules.append(Recurrence(**RecurrenceImport.parse_obj(data).dict()).dict())
+                    else:
+                        reject(line_number, f"Unknown kind: {kind}")
+                        continue
+                except ValidationError as e:
+                    reject(line_number, e.errors()[0]['msg'])
+                    continue
+                if len(batch) >= batch_size:
+                    await flush()
+                if len(rules) >= batch_size:
+                    await flush_rules()
+            if batch:
+                await flush()
+            if rules:
+                await flush_rules()
+            return result
+        except Exception as e:
+            logger.error(f"Error importing events: {e}")
+            raise
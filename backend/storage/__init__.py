@@ -0,0 +1,29 @@
+import os
+
+from .base import BulkResult, ChangeKey, CustomDate, PageKey, SearchHit, StorageEngine
+from .memory import MemoryStorageEngine
+from .mongo import MongoStorageEngine, client_options_from_env
+from .sqlite import SQLiteStorageEngine
+
+
+def create_storage_engine(default_sqlite_path: str = "calendar.db") -> StorageEngine:
+    """Build the engine named by the STORAGE_ENGINE env var: mongo (default), memory or sqlite.
+
+    The mongo engine connects on initialize(); MONGO_URL and DB_NAME are only
+    required then, and Motor and PyMongo are only imported then.
+    """
+    engine_name = os.environ.get('STORAGE_ENGINE', 'mongo').lower()
+    if engine_name == 'mongo':
+        return MongoStorageEngine(os.environ.get('MONGO_URL'), os.environ.get('DB_NAME'), client_options_from_env())
+    if engine_name == 'memory':
+        return MemoryStorageEngine()
+    if engine_name == 'sqlite':
+        return SQLiteStorageEngine(os.environ.get('SQLITE_PATH', default_sqlite_path))
+    raise RuntimeError(f"Unknown STORAGE_ENGINE: {engine_name}")
+
+
+__all__ = [
+    "BulkResult", "ChangeKey", "CustomDate", "PageKey", "SearchHit", "StorageEngine",
+    "MemoryStorageEngine", "MongoStorageEngine", "SQLiteStorageEngine",
+    "create_storage_engine",
+]
@@ -0,0 +1,239 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from calendar_math import MONTHS_PER_YEAR, CustomDate
+
+# Outcome of one bulk operation: (status, error message)
+BulkResult = Tuple[str, Optional[str]]
+
+# Keyset pagination position: (ordinal, created_at, id) of the last event on
+# a page. Within a month, ordinal order is day order.
+PageKey = Tuple[int, datetime, str]
+
+# Change feed position: (changed_at or deleted_at, id) of the last change seen
+ChangeKey = Tuple[datetime, str]
+
+# A search hit: the event document and its relevance score, higher is better
+SearchHit = Tuple[Dict[str, Any], float]
+
+WORD = re.compile(r"\w+")
+
+
+def search_terms(text: str) -> List[str]:
+    """Lowercased words of a note or search query, without duplicates."""
+    return list(dict.fromkeys(WORD.findall(text.lower())))
+
+
+class StorageEngine(ABC):
+    """Persistence interface behind CalendarService.
+
+    Engines store and return plain documents (dicts without MongoDB's ``_id``);
+    building and validating models is left to the service.
+    """
+
+    name = "base"
+    # Prefix for month version ETags. Engines that lose their data on restart
+    # set a per-process value so old ETags never match the new, reset counters.
+    version_epoch = ""
+
+    async def initialize(self) -> None:
+        """Prepare indexes/schema. Called once at startup."""
+
+    async def close(self) -> None:
+        """Release connections and other resources."""
+
+    async def diagnostics(self) -> Dict[str, Any]:
+        """Describe the engine's indexes and how queries use them."""
+        return {"engine": self.name}
+
+    async def ping(self) -> None:
+        """Check that the database answers; raises if it does not."""
+
+    def pool_stats(self) -> Optional[Dict[str, Any]]:
+        """Connection pool counters, for engines that keep a pool."""
+        return None
+
+    @abstractmethod
+    async def get_current_date(self) -> Optional[Dict[str, Any]]:
+        """Return the current date document, if one has been set."""
+
+    @abstractmethod
+    async def set_current_date(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Atomically replace the current date document."""
+
+    @abstractmethod
+    async def init_current_date(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Store ``doc`` as the current date unless one exists; return the stored date."""
+
+    @abstractmethod
+    async def advance_current_date(self, days: int, updated_at: datetime) -> Optional[Dict[str, Any]]:
+        """Atomically move the current date ``days`` days forward and return it.
+
+        The new date is computed from the stored one in a single write, so
+        concurrent advances add up. Returns None if no current date is set.
+        """
+
+    @abstractmethod
+    async def find_events_for_month(self, year: int, month: int) -> List[Dict[str, Any]]:
+        """Return every event in a month, ordered by day."""
+
+    @abstractmethod
+    def iter_events_between(
+        self, start_ordinal: int, end_ordinal: int, event_type: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield events whose ordinal lies between the bounds inclusive, in date order."""
+
+    @abstractmethod
+    async def get_month_version(self, year: int, month: int) -> int:
+        """Return the month's version counter, bumped by every write to its events."""
+
+    async def get_month_versions(self, year: int) -> List[int]:
+        """Version counters of all months in a year, in month order."""
+        return [await self.get_month_version(year, month) for month in range(MONTHS_PER_YEAR)]
+
+    @abstractmethod
+    async def count_events_by_day(self, year: int) -> Dict[Tuple[int, int], int]:
+        """Number of events on each (month, day) of a year that has any."""
+
+    @abstractmethod
+    async def count_events_by_type(self, year: int) -> Dict[Tuple[int, int, str], int]:
+        """Number of events of each type on each (month, day) of a year."""
+
+    @abstractmethod
+    async def find_events_page(
+        self,
+        start_ordinal: int,
+        end_ordinal: int,
+        limit: int,
+        after: Optional[PageKey] = None,
+        event_type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Up to ``limit`` events in an ordinal range sorted by (ordinal, created_at, id),
+        starting after the ``after`` key."""
+
+    @abstractmethod
+    async def search_events(
+        self,
+        query: str,
+        limit: int,
+        offset: int = 0,
+        year: Optional[int] = None,
+        event_type: Optional[str] = None,
+    ) -> List[SearchHit]:
+        """Events whose note matches any word of ``query``, best match first."""
+
+    @abstractmethod
+    async def find_event(self, event_id: str) -> Optional[Dict[str, Any]]:
+        """Return a single event by its UUID."""
+
+    @abstractmethod
+    async def insert_event(self, doc: Dict[str, Any]) -> None:
+        """Store a new event."""
+
+    @abstractmethod
+    async def update_event(self, event_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Apply ``fields`` to an event and return the updated document."""
+
+    @abstractmethod
+    async def delete_event(self, event_id: str) -> Optional[Dict[str, Any]]:
+        """Delete an event; return its year and month, or None if it did not exist."""
+
+    @abstractmethod
+    async def find_changed_events(self, after: Optional[ChangeKey], limit: int) -> List[Dict[str, Any]]:
+        """Up to ``limit`` events sorted by (changed_at, id), starting after ``after``.
+
+        ``changed_at`` is set by the service on every write, including imports.
+        """
+
+    # Tombstones record deleted events so clients can sync deletions
+    @abstractmethod
+    async def insert_tombstones(self, docs: List[Dict[str, Any]]) -> None:
+        """Store ``{id, deleted_at}`` records of deleted events."""
+
+    @abstractmethod
+    async def find_tombstones(self, after: Optional[ChangeKey], limit: int) -> List[Dict[str, Any]]:
+        """Up to ``limit`` tombstones sorted by (deleted_at, id), starting after ``after``."""
+
+    @abstractmethod
+    async def prune_tombstones(self, before: datetime) -> int:
+        """Delete tombstones older than ``before``; return how many were removed.
+
+        The newest pruned tombstone's (deleted_at, id) is recorded as the
+        tombstone horizon before any tombstone is deleted.
+        """
+
+    @abstractmethod
+    async def get_tombstone_horizon(self) -> Optional[ChangeKey]:
+        """(deleted_at, id) of the newest pruned tombstone, or None if none were pruned."""
+
+    # Recurrence rules. Their occurrences are generated by the service, so
+    # engines only store the rules and count how often they change.
+    @abstractmethod
+    async def find_recurrences(
+        self, start_ordinal: Optional[int] = None, end_ordinal: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Rules that may have occurrences between the bounds inclusive (all rules if omitted)."""
+
+    @abstractmethod
+    async def find_recurrence(self, rule_id: str) -> Optional[Dict[str, Any]]:
+        """Return a single recurrence rule by its UUID."""
+
+    @abstractmethod
+    async def insert_recurrence(self, doc: Dict[str, Any]) -> None:
+        """Store a new recurrence rule and bump the recurrences version."""
+
+    @abstractmethod
+    async def delete_recurrence(self, rule_id: str) -> bool:
+        """Delete a rule and bump the recurrences version; False if it did not exist."""
+
+    @abstractmethod
+    async def get_recurrences_version(self) -> int:
+        """Counter bumped by every change to the recurrence rules."""
+
+    @abstractmethod
+    def iter_event_batches(self, batch_size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield every stored event in lists of at most ``batch_size`` documents."""
+
+    async def insert_many(self, docs: List[Dict[str, Any]]) -> int:
+        """Insert new events, skipping ids that already exist; return the number inserted."""
+        inserted = 0
+        for doc in docs:
+            if await self.find_event(doc['id']) is None:
+                await self.insert_event(doc)
+                inserted += 1
+        return inserted
+
+    async def insert_recurrences(self, docs: List[Dict[str, Any]]) -> int:
+        """Insert new recurrence rules, skipping ids that already exist; return the number inserted."""
+        inserted = 0
+        for doc in docs:
+            if await self.find_recurrence(doc['id']) is None:
+                await self.insert_recurrence(doc)
+                inserted += 1
+        return inserted
+
+    async def bulk_write(self, operations: List[Dict[str, Any]]) -> List[BulkResult]:
+        """Apply create/update/delete operations, returning one result per operation.
+
+        Operations are ``{"op": "create", "doc": ...}``, ``{"op": "update",
+        "id": ..., "fields": ...}`` or ``{"op": "delete", "id": ...}``. A failing
+        operation does not stop the others. This default applies them one at a
+        time; engines that can batch writes override it.
+        """
+        results = []
+        for operation in operations:
+            try:
+                if operation["op"] == "create":
+                    await self.insert_event(operation["doc"])
+                    results.append(("created", None))
+                elif operation["op"] == "update":
+                    found = await self.update_event(operation["id"], operation["fields"]) is not None
+                    results.append(("updated" if found else "not_found", None))
+                else:
+                    found = await self.delete_event(operation["id"]) is not None
+                    results.append(("deleted" if found else "not_found", None))
+            except Exception as e:
+                results.append(("error", str(e)))
+        return results
@@ -0,0 +1,264 @@
+from collections import Counter
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import copy
+import heapq
+import math
+import uuid
+
+from calendar_math import from_ordinal, to_ordinal
+from .base import WORD, ChangeKey, PageKey, SearchHit, StorageEngine, search_terms
+
+
+def _page_key(doc: Dict[str, Any]) -> PageKey:
+    return doc['ordinal'], doc['created_at'], doc['id']
+
+
+class MemoryStorageEngine(StorageEngine):
+    """In-process storage engine for tests, benchmarks and single-worker deployments.
+
+    Events are indexed both by ``id`` and by ``(year, month)``, so id lookups
+    and month reads are dictionary lookups. Notes are kept in an inverted
+    index from word to the events containing it for search. Documents are copied on the way in
+    and out so callers can never mutate the stored state.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._current_date: Optional[Dict[str, Any]] = None
+        self._events: Dict[str, Dict[str, Any]] = {}
+        self._by_month: Dict[Tuple[int, int], Dict[str, Dict[str, Any]]] = {}
+        self._month_versions: Dict[Tuple[int, int], int] = {}
+        self._tombstones: List[Dict[str, Any]] = []
+        self._tombstone_horizon: Optional[ChangeKey] = None
+        self._recurrences: Dict[str, Dict[str, Any]] = {}
+        self._recurrences_version = 0
+        # word -> {event id: occurrences of the word in the note}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self.version_epoch = uuid.uuid4().hex[:8] + "."
+
+    def _bump_month_version(self, year: int, month: int) -> None:
+        self._month_versions[(year, month)] = self._month_versions.get((year, month), 0) + 1
+
+    def _index_note(self, doc: Dict[str, Any]) -> None:
+        for word, count in Counter(WORD.findall(doc['note'].lower())).items():
+            self._postings.setdefault(word, {})[doc['id']] = count
+
+    def _unindex_note(self, doc: Dict[str, Any]) -> None:
+        for word in search_terms(doc['note']):
+            postings = self._postings.get(word)
+            if postings is not None:
+                postings.pop(doc['id'], None)
+                if not postings:
+                    del self._postings[word]
+
+    async def diagnostics(self) -> Dict[str, Any]:
+        return {
+            "engine": self.name,
+            "events": len(self._events),
+            "months": len(self._by_month),
+            "indexed_words": len(self._postings),
+        }
+
+    async def get_current_date(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._current_date)
+
+    async def set_current_date(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        self._current_date = copy.deepcopy(doc)
+        return copy.deepcopy(doc)
+
+    async def init_current_date(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        if self._current_date is None:
+            self._current_date = copy.deepcopy(doc)
+        return copy.deepcopy(self._current_date)
+
+    async def advance_current_date(self, days: int, updated_at: datetime) -> Optional[Dict[str, Any]]:
+        if self._current_date is None:
+            return None
+        current = self._current_date
+        year, month, day = from_ordinal(to_ordinal(current['year'], current['month'], current['day']) + days)
+        current.update(year=year, month=month, day=day, updated_at=updated_at)
+        return copy.deepcopy(current)
+
+    async def find_events_for_month(self, year: int, month: int) -> List[Dict[str, Any]]:
+        month_events = self._by_month.get((year, month), {})
+        return [copy.deepcopy(doc) for doc in sorted(month_events.values(), key=lambda doc: doc['day'])]
+
+    async def iter_events_between(
+        self, start_ordinal: int, end_ordinal: int, event_type: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        first_month = from_ordinal(start_ordinal)[:2]
+        last_month = from_ordinal(end_ordinal)[:2]
+        months = sorted(key for key in self._by_month if first_month <= key <= last_month)
+        for year, month in months:
+            for doc in await self.find_events_for_month(year, month):
+                if start_ordinal <= doc['ordinal'] <= end_ordinal and event_type in (None, doc['type']):
+                    yield doc
+
+    async def find_events_page(
+        self,
+        start_ordinal: int,
+        end_ordinal: int,
+        limit: int,
+        after: Optional[PageKey] = None,
+        event_type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        first_month = from_ordinal(start_ordinal)[:2]
+        last_month = from_ordinal(end_ordinal)[:2]
+        candidates = (
+            doc
+            for key, month_events in self._by_month.items() if first_month <= key <= last_month
+            for doc in month_events.values()
+            if start_ordinal <= doc['ordinal'] <= end_ordinal and event_type in (None, doc['type'])
+            and (after is None or _page_key(doc) > after)
+        )
+        # Selects the page without sorting the whole range
+        return [copy.deepcopy(doc) for doc in heapq.nsmallest(limit, candidates, key=_page_key)]
+
+    async def search_events(
+        self,
+        query: str,
+        limit: int,
+        offset: int = 0,
+        year: Optional[int] = None,
+        event_type: Optional[str] = None,
+    ) -> List[SearchHit]:
+        # TF-IDF: words that appear in fewer notes weigh more
+        scores: Dict[str, float] = {}
+        for word in search_terms(query):
+            postings = self._postings.get(word, {})
+            if not postings:
+                continue
+            idf = math.log(1 + len(self._events) / len(postings))
+            for event_id, count in postings.items():
+                scores[event_id] = scores.get(event_id, 0.0) + count * idf
+        hits = [
+            (self._events[event_id], score) for event_id, score in scores.items()
+            if year in (None, self._events[event_id]['year'])
+            and event_type in (None, self._events[event_id]['type'])
+        ]
+        hits.sort(key=lambda hit: (-hit[1], hit[0]['ordinal'], hit[0]['id']))
+        return [(copy.deepcopy(doc), score) for doc, score in hits[offset:offset + limit]]
+
+    async def find_changed_events(self, after: Optional[ChangeKey], limit: int) -> List[Dict[str, Any]]:
+        candidates = (
+            doc for doc in self._events.values()
+            if after is None or (doc['changed_at'], doc['id']) > after
+        )
+        changed = heapq.nsmallest(limit, candidates, key=lambda doc: (doc['changed_at'], doc['id']))
+        return [copy.deepcopy(doc) for doc in changed]
+
+    async def insert_tombstones(self, docs: List[Dict[str, Any]]) -> None:
+        self._tombstones.extend(copy.deepcopy(docs))
+
+    async def find_tombstones(self, after: Optional[ChangeKey], limit: int) -> List[Dict[str, Any]]:
+        candidates = (
+            doc for doc in self._tombstones
+            if after is None or (doc['deleted_at'], doc['id']) > after
+        )
+        found = heapq.nsmallest(limit, candidates, key=lambda doc: (doc['deleted_at'], doc['id']))
+        return [copy.deepcopy(doc) for doc in found]
+
+    async def prune_tombstones(self, before: datetime) -> int:
+        kept = [doc for doc in self._tombstones if doc['deleted_at'] >= before]
+        pruned = [(doc['deleted_at'], doc['id']) for doc in self._tombstones if doc['deleted_at'] < before]
+        if pruned:
+            self._tombstone_horizon = max(pruned + ([self._tombstone_horizon] if self._tombstone_horizon else []))
+        self._tombstones = kept
+        return len(pruned)
+
+    async def get_tombstone_horizon(self) -> Optional[ChangeKey]:
+        return self._tombstone_horizon
+
+    async def find_recurrences(
+        self, start_ordinal: Optional[int] = None, end_ordinal: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        return [
+            copy.deepcopy(rule) for rule in self._recurrences.values()
+            if (end_ordinal is None or rule['start_ordinal'] <= end_ordinal)
+            and (start_ordinal is None or rule['end_ordinal'] is None or rule['end_ordinal'] >= start_ordinal)
+        ]
+
+    async def find_recurrence(self, rule_id: str) -> Optional[Dict[str, Any]]:
+        rule = self._recurrences.get(rule_id)
+        return copy.deepcopy(rule) if rule else None
+
+    async def insert_recurrence(self, doc: Dict[str, Any]) -> None:
+        if doc['id'] in self._recurrences:
+            raise ValueError(f"Recurrence {doc['id']} already exists")
+        self._recurrences[doc['id']] = copy.deepcopy(doc)
+        self._recurrences_version += 1
+
+    async def delete_recurrence(self, rule_id: str) -> bool:
+        if self._recurrences.pop(rule_id, None) is None:
+            return False
+        self._recurrences_version += 1
+        return True
+
+    async def get_recurrences_version(self) -> int:
+        return self._recurrences_version
+
+    async def iter_event_batches(self, batch_size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        event_ids = list(self._events)
+        for start in range(0, len(event_ids), batch_size):
+            batch = [self._events.get(event_id) for event_id in event_ids[start:start + batch_size]]
+            yield [copy.deepcopy(doc) for doc in batch if doc is not None]
+
+    async def get_month_version(self, year: int, month: int) -> int:
+        return self._month_versions.get((year, month), 0)
+
+    async def count_events_by_day(self, year: int) -> Dict[Tuple[int, int], int]:
+        counts: Dict[Tuple[int, int], int] = {}
+        for (event_year, month), month_events in self._by_month.items():
+            if event_year == year:
+                for doc in month_events.values():
+                    counts[(month, doc['day'])] = counts.get((month, doc['day']), 0) + 1
+        return counts
+
+    async def count_events_by_type(self, year: int) -> Dict[Tuple[int, int, str], int]:
+        counts: Dict[Tuple[int, int, str], int] = {}
+        for (event_year, month), month_events in self._by_month.items():
+            if event_year == year:
+                for doc in month_events.values():
+                    key = (month, doc['day'], doc['type'])
+                    counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    async def find_event(self, event_id: str) -> Optional[Dict[str, Any]]:
+        doc = self._events.get(event_id)
+        return copy.deepcopy(doc) if doc else None
+
+    async def insert_event(self, doc: Dict[str, Any]) -> None:
+        if doc['id'] in self._events:
+            raise ValueError(f"Event {doc['id']} already exists")
+        stored = copy.deepcopy(doc)
+        self._events[stored['id']] = stored
+        self._by_month.setdefault((stored['year'], stored['month']), {})[stored['id']] = stored
+        self._index_note(stored)
+        self._bump_month_version(stored['year'], stored['month'])
+
+    async def update_event(self, event_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        doc = self._events.get(event_id)
+        if doc is None:
+            return None
+        if 'note' in fields:
+            self._unindex_note(doc)
+        doc.update(copy.deepcopy(fields))
+        if 'note' in fields:
+            self._index_note(doc)
+        self._bump_month_version(doc['year'], doc['month'])
+        return copy.deepcopy(doc)
+
+    async def delete_event(self, event_id: str) -> Optional[Dict[str, Any]]:
+        doc = self._events.pop(event_id, None)
+        if doc is None:
+            return None
+        key = (doc['year'], doc['month'])
+        month_events = self._by_month[key]
+        del month_events[event_id]
+        self._unindex_note(doc)
+        if not month_events:
+            del self._by_month[key]
+        self._bump_month_version(*key)
+        return {'year': doc['year'], 'month': doc['month']}
@@ -0,0 +1,559 @@
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import logging
+import os
+import threading
+
+from calendar_math import DAYS_PER_MONTH, DAYS_PER_YEAR, MONTHS_PER_YEAR, from_ordinal, year_bounds
+from .base import BulkResult, ChangeKey, PageKey, SearchHit, StorageEngine
+
+logger = logging.getLogger(__name__)
+
+# _id of the single current_date document
+CURRENT_DATE_KEY = "current"
+
+# _id of the recurrences version counter in the month_versions collection
+RECURRENCES_VERSION_KEY = "recurrences"
+
+# _id of the single tombstone_horizon document
+TOMBSTONE_HORIZON_KEY = "pruned"
+
+
+# Events are identified by their UUID; leave the ObjectId on the server
+EVENT_PROJECTION = {"_id": 0}
+
+
+# Aggregation expression computing calendar_math.to_ordinal() server-side
+ORDINAL_EXPRESSION = {
+    "$add": [
+        {"$multiply": [{"$subtract": ["$year", 1]}, DAYS_PER_YEAR]},
+        {"$multiply": ["$month", DAYS_PER_MONTH]},
+        {"$subtract": ["$day", 1]},
+    ]
+}
+
+
+# Client pool settings and the env vars they are read from
+POOL_OPTIONS = {
+    "maxPoolSize": ("MONGO_MAX_POOL_SIZE", int),
+    "minPoolSize": ("MONGO_MIN_POOL_SIZE", int),
+    "maxIdleTimeMS": ("MONGO_MAX_IDLE_TIME_MS", int),
+    "waitQueueTimeoutMS": ("MONGO_WAIT_QUEUE_TIMEOUT_MS", int),
+    "serverSelectionTimeoutMS": ("MONGO_SERVER_SELECTION_TIMEOUT_MS", int),
+    "compressors": ("MONGO_COMPRESSORS", str),
+}
+
+
+def client_options_from_env() -> Dict[str, Any]:
+    """MongoClient keyword arguments for the pool settings set in the environment.
+
+    Unset variables keep the driver's defaults (100 connections, no minimum,
+    no wait-queue timeout, 30 s server selection, no compression).
+    """
+    options = {}
+    for option, (variable, convert) in POOL_OPTIONS.items():
+        value = os.environ.get(variable)
+        if value:
+            options[option] = convert(value)
+    return options
+
+
+class PoolStats:
+    """Connection pool counters, summed over the pools of every server.
+
+    Implements PyMongo's ConnectionPoolListener interface; the driver class is
+    mixed in by ``MongoStorageEngine.connect()`` so this module imports without
+    PyMongo. The driver reports events from its own threads, hence the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.created = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.clears = 0
+
+    def _add(self, **deltas: int) -> None:
+        with self._lock:
+            for counter, delta in deltas.items():
+                setattr(self, counter, getattr(self, counter) + delta)
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        self._add(clears=1)
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_created(self, event) -> None:
+        self._add(open=1, created=1)
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        self._add(open=-1)
+
+    def connection_check_out_started(self, event) -> None:
+        self._add(waiting=1)
+
+    def connection_check_out_failed(self, event) -> None:
+        self._add(waiting=-1, checkout_failures=1)
+
+    def connection_checked_out(self, event) -> None:
+        self._add(waiting=-1, in_use=1, checkouts=1)
+
+    def connection_checked_in(self, event) -> None:
+        self._add(in_use=-1)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "open": self.open,
+                "in_use": self.in_use,
+                "waiting": self.waiting,
+                "created": self.created,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "clears": self.clears,
+            }
+
+
+class MongoStorageEngine(StorageEngine):
+    """Storage engine backed by the ``current_date`` and ``events`` collections.
+
+    The client is created by ``connect()``, normally from ``initialize()`` in
+    the app's lifespan, so it is bound to the serving event loop and building
+    the engine needs no database settings. Motor and PyMongo are imported on
+    first use too, as they take longer to import than the rest of the app.
+    """
+
+    name = "mongo"
+
+    def __init__(self, url: Optional[str], db_name: Optional[str], client_options: Optional[Dict[str, Any]] = None):
+        self.url = url
+        self.db_name = db_name
+        self.client_options = client_options or {}
+        self.pool: Optional[PoolStats] = None
+        self.client = None
+
+    def connect(self) -> None:
+        if self.client is not None:
+            return
+        if not self.url or not self.db_name:
+            raise RuntimeError("MONGO_URL and DB_NAME must be set for the mongo storage engine")
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from pymongo.monitoring import ConnectionPoolListener
+        self.pool = type("PoolStatsListener", (PoolStats, ConnectionPoolListener), {})()
+        self.client = AsyncIOMotorClient(self.url, event_listeners=[self.pool], **self.client_options)
+        self.db = self.client[self.db_name]
+        self.current_date_collection = self.db.current_date
+        self.events_collection = self.db.events
+        self.month_versions_collection = self.db.month_versions
+        self.recurrences_collection = self.db.recurrences
+        self.tombstones_collection = self.db.tombstones
+        self.tombstone_horizon_collection = self.db.tombstone_horizon
+
+    async def initialize(self) -> None:
+        from indexes import ensure_indexes, verify_indexes
+        self.connect()
+        await self.migrate_current_date()
+        await self.backfill_ordinals()
+        await self.backfill_changed_at()
+        await ensure_indexes(self.db)
+        missing = {name: info["missing"] for name, info in (await verify_indexes(self.db)).items() if info["missing"]}
+        if missing:
+            logger.warning(f"Missing indexes after startup: {missing}")
+
+    async def backfill_ordinals(self) -> int:
+        """Add the ordinal field to events stored before it existed."""
+        result = await self.events_collection.update_many(
+            {"ordinal": {"$exists": False}},
+            [{"$set": {"ordinal": ORDINAL_EXPRESSION}}]
+        )
+        if result.modified_count:
+            logger.info(f"Backfilled ordinal on {result.modified_count} events")
+        return result.modified_count
+
+    async def backfill_changed_at(self) -> int:
+        """Set the change feed's changed_at field on events stored before it existed."""
+        result = await self.events_collection.update_many(
+            {"changed_at": {"$exists": False}},
+            [{"$set": {"changed_at": "$updated_at"}}]
+        )
+        if result.modified_count:
+            logger.info(f"Backfilled changed_at on {result.modified_count} events")
+        return result.modified_count
+
+    async def close(self) -> None:
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+    async def ping(self) -> None:
+        self.connect()
+        await self.db.command("ping")
+
+    def pool_stats(self) -> Optional[Dict[str, Any]]:
+        if self.pool is None:
+            return None
+        return {**self.pool.stats(), "options": self.client_options}
+
+    async def diagnostics(self) -> Dict[str, Any]:
+        from indexes import explain_queries, verify_indexes
+        return {
+            "engine": self.name,
+            "indexes": await verify_indexes(self.db),
+            "query_plans": await explain_queries(self.db),
+        }
+
+    async def get_current_date(self) -> Optional[Dict[str, Any]]:
+        doc = await self.current_date_collection.find_one({"_id": CURRENT_DATE_KEY}, {"_id": 0})
+        return doc
+
+    async def set_current_date(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        from pymongo import ReturnDocument
+        # A single upsert on a fixed key: readers never see the date missing
+        return await self.current_date_collection.find_one_and_update(
+            {"_id": CURRENT_DATE_KEY},
+            {"$set": doc},
+            projection={"_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def init_current_date(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        from pymongo import ReturnDocument
+        return await self.current_date_collection.find_one_and_update(
+            {"_id": CURRENT_DATE_KEY},
+            {"$setOnInsert": doc},
+            projection={"_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def advance_current_date(self, days: int, updated_at: datetime) -> Optional[Dict[str, Any]]:
+        from pymongo import ReturnDocument
+        # Pipeline update: the new date is computed from the stored one on the server
+        new_ordinal = {"$add": [ORDINAL_EXPRESSION, days]}
+        return await self.current_date_collection.find_one_and_update(
+            {"_id": CURRENT_DATE_KEY},
+            [
+                {"$set": {"_ordinal": new_ordinal}},
+                {"$set": {
+                    "year": {"$add": [{"$toInt": {"$floor": {"$divide": ["$_ordinal", DAYS_PER_YEAR]}}}, 1]},
+                    "month": {"$toInt": {"$floor": {"$divide": [{"$mod": ["$_ordinal", DAYS_PER_YEAR]}, DAYS_PER_MONTH]}}},
+                    "day": {"$add": [{"$toInt": {"$mod": ["$_ordinal", DAYS_PER_MONTH]}}, 1]},
+                    "updated_at": updated_at,
+                }},
+                {"$project": {"_ordinal": 0}},
+            ],
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def migrate_current_date(self) -> None:
+        """Move a current date stored under an ObjectId onto the fixed key."""
+        legacy = await self.current_date_collection.find_one({"_id": {"$ne": CURRENT_DATE_KEY}})
+        if legacy is None:
+            return
+        legacy.pop('_id')
+        # Delete first: the unique id index would reject the copy otherwise
+        await self.current_date_collection.delete_many({"_id": {"$ne": CURRENT_DATE_KEY}})
+        await self.init_current_date(legacy)
+
+    async def find_events_for_month(self, year: int, month: int) -> List[Dict[str, Any]]:
+        cursor = self.events_collection.find({"year": year, "month": month}, EVENT_PROJECTION).sort("day", 1)
+        return await cursor.to_list(length=None)
+
+    async def iter_events_between(
+        self, start_ordinal: int, end_ordinal: int, event_type: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        query: Dict[str, Any] = {"ordinal": {"$gte": start_ordinal, "$lte": end_ordinal}}
+        if event_type:
+            query["type"] = event_type
+        async for doc in self.events_collection.find(query, EVENT_PROJECTION).sort("ordinal", 1):
+            yield doc
+
+    async def find_events_page(
+        self,
+        start_ordinal: int,
+        end_ordinal: int,
+        limit: int,
+        after: Optional[PageKey] = None,
+        event_type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        query: Dict[str, Any] = {"ordinal": {"$gte": start_ordinal, "$lte": end_ordinal}}
+        if after is not None:
+            ordinal, created_at, event_id = after
+            # The $gte bound keeps the index scan starting at the cursor
+            query["ordinal"]["$gte"] = max(start_ordinal, ordinal)
+            query["$or"] = [
+                {"ordinal": {"$gt": ordinal}},
+                {"ordinal": ordinal, "created_at": {"$gt": created_at}},
+                {"ordinal": ordinal, "created_at": created_at, "id": {"$gt": event_id}},
+            ]
+        if event_type:
+            query["type"] = event_type
+        cursor = self.events_collection.find(query, EVENT_PROJECTION).sort(
+            [("ordinal", 1), ("created_at", 1), ("id", 1)]
+        ).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def search_events(
+        self,
+        query: str,
+        limit: int,
+        offset: int = 0,
+        year: Optional[int] = None,
+        event_type: Optional[str] = None,
+    ) -> List[SearchHit]:
+        # $text matches any word of the query through the note_text index
+        text_filter: Dict[str, Any] = {"$text": {"$search": query}}
+        if year is not None:
+            text_filter["year"] = year
+        if event_type:
+            text_filter["type"] = event_type
+        score = {"$meta": "textScore"}
+        cursor = self.events_collection.find(text_filter, {**EVENT_PROJECTION, "score": score}).sort(
+            [("score", score), ("ordinal", 1), ("id", 1)]
+        ).skip(offset).limit(limit)
+        return [(doc, doc.pop("score")) async for doc in cursor]
+
+    async def get_month_version(self, year: int, month: int) -> int:
+        doc = await self.month_versions_collection.find_one({"_id": f"{year}-{month}"})
+        return doc["version"] if doc else 0
+
+    async def get_month_versions(self, year: int) -> List[int]:
+        keys = [f"{year}-{month}" for month in range(MONTHS_PER_YEAR)]
+        cursor = self.month_versions_collection.find({"_id": {"$in": keys}})
+        versions = {doc["_id"]: doc["version"] async for doc in cursor}
+        return [versions.get(key, 0) for key in keys]
+
+    async def count_events_by_day(self, year: int) -> Dict[Tuple[int, int], int]:
+        first, last = year_bounds(year)
+        pipeline = [
+            {"$match": {"ordinal": {"$gte": first, "$lte": last}}},
+            {"$group": {"_id": "$ordinal", "count": {"$sum": 1}}},
+        ]
+        counts = {}
+        async for doc in self.events_collection.aggregate(pipeline):
+            _, month, day = from_ordinal(doc["_id"])
+            counts[(month, day)] = doc["count"]
+        return counts
+
+    async def count_events_by_type(self, year: int) -> Dict[Tuple[int, int, str], int]:
+        # Both grouped fields are in the ordinal_type index, so the notes are
+        # never read and the result has one row per distinct (day, type)
+        first, last = year_bounds(year)
+        pipeline = [
+            {"$match": {"ordinal": {"$gte": first, "$lte": last}}},
+            {"$group": {"_id": {"ordinal": "$ordinal", "type": "$type"}, "count": {"$sum": 1}}},
+        ]
+        counts = {}
+        async for doc in self.events_collection.aggregate(pipeline):
+            _, month, day = from_ordinal(doc["_id"]["ordinal"])
+            counts[(month, day, doc["_id"]["type"])] = doc["count"]
+        return counts
+
+    async def _bump_month_versions(self, months: Iterable[Tuple[int, int]]) -> None:
+        from pymongo import UpdateOne
+        requests = [
+            UpdateOne({"_id": f"{year}-{month}"}, {"$inc": {"version": 1}}, upsert=True)
+            for year, month in set(months)
+        ]
+        if requests:
+            await self.month_versions_collection.bulk_write(requests, ordered=False)
+
+    async def find_event(self, event_id: str) -> Optional[Dict[str, Any]]:
+        return await self.events_collection.find_one({"id": event_id}, EVENT_PROJECTION)
+
+    async def insert_event(self, doc: Dict[str, Any]) -> None:
+        # insert_one adds _id to the dict it is given, so pass a copy
+        await self.events_collection.insert_one(dict(doc))
+        await self._bump_month_versions([(doc['year'], doc['month'])])
+
+    async def update_event(self, event_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        from pymongo import ReturnDocument
+        doc = await self.events_collection.find_one_and_update(
+            {"id": event_id},
+            {"$set": fields},
+            projection=EVENT_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            return None
+        await self._bump_month_versions([(doc['year'], doc['month'])])
+        return doc
+
+    async def delete_event(self, event_id: str) -> Optional[Dict[str, Any]]:
+        doc = await self.events_collection.find_one_and_delete(
+            {"id": event_id}, projection={"_id": 0, "year": 1, "month": 1}
+        )
+        if doc is None:
+            return None
+        await self._bump_month_versions([(doc['year'], doc['month'])])
+        return doc
+
+    async def _find_after(
+        self, collection, field: str, after: Optional[ChangeKey], limit: int
+    ) -> List[Dict[str, Any]]:
+        query: Dict[str, Any] = {}
+        if after is not None:
+            changed_at, doc_id = after
+            query = {
+                field: {"$gte": changed_at},
+                "$or": [{field: {"$gt": changed_at}}, {"id": {"$gt": doc_id}}],
+            }
+        cursor = collection.find(query, EVENT_PROJECTION).sort([(field, 1), ("id", 1)]).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def find_changed_events(self, after: Optional[ChangeKey], limit: int) -> List[Dict[str, Any]]:
+        return await self._find_after(self.events_collection, "changed_at", after, limit)
+
+    async def insert_tombstones(self, docs: List[Dict[str, Any]]) -> None:
+        if docs:
+            await self.tombstones_collection.insert_many([dict(doc) for doc in docs], ordered=False)
+
+    async def find_tombstones(self, after: Optional[ChangeKey], limit: int) -> List[Dict[str, Any]]:
+        return await self._find_after(self.tombstones_collection, "deleted_at", after, limit)
+
+    async def prune_tombstones(self, before: datetime) -> int:
+        newest = await self.tombstones_collection.find_one(
+            {"deleted_at": {"$lt": before}}, {"_id": 0}, sort=[("deleted_at", -1), ("id", -1)]
+        )
+        if newest is None:
+            return 0
+        # Recorded before the delete, so a reader never sees a tombstone
+        # missing without the horizon covering it
+        horizon = await self.get_tombstone_horizon()
+        if horizon is None or (newest["deleted_at"], newest["id"]) > horizon:
+            await self.tombstone_horizon_collection.update_one(
+                {"_id": TOMBSTONE_HORIZON_KEY},
+                {"$set": {"deleted_at": newest["deleted_at"], "id": newest["id"]}},
+                upsert=True
+            )
+        result = await self.tombstones_collection.delete_many({"deleted_at": {"$lt": before}})
+        return result.deleted_count
+
+    async def get_tombstone_horizon(self) -> Optional[ChangeKey]:
+        doc = await self.tombstone_horizon_collection.find_one({"_id": TOMBSTONE_HORIZON_KEY})
+        return (doc["deleted_at"], doc["id"]) if doc else None
+
+    async def find_recurrences(
+        self, start_ordinal: Optional[int] = None, end_ordinal: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        query: Dict[str, Any] = {}
+        if end_ordinal is not None:
+            query["start_ordinal"] = {"$lte": end_ordinal}
+        if start_ordinal is not None:
+            query["$or"] = [{"end_ordinal": None}, {"end_ordinal": {"$gte": start_ordinal}}]
+        return await self.recurrences_collection.find(query, EVENT_PROJECTION).to_list(length=None)
+
+    async def find_recurrence(self, rule_id: str) -> Optional[Dict[str, Any]]:
+        return await self.recurrences_collection.find_one({"id": rule_id}, EVENT_PROJECTION)
+
+    async def _bump_recurrences_version(self) -> None:
+        await self.month_versions_collection.update_one(
+            {"_id": RECURRENCES_VERSION_KEY}, {"$inc": {"version": 1}}, upsert=True
+        )
+
+    async def insert_recurrence(self, doc: Dict[str, Any]) -> None:
+        await self.recurrences_collection.insert_one(dict(doc))
+        await self._bump_recurrences_version()
+
+    async def delete_recurrence(self, rule_id: str) -> bool:
+        result = await self.recurrences_collection.delete_one({"id": rule_id})
+        if not result.deleted_count:
+            return False
+        await self._bump_recurrences_version()
+        return True
+
+    async def get_recurrences_version(self) -> int:
+        doc = await self.month_versions_collection.find_one({"_id": RECURRENCES_VERSION_KEY})
+        return doc["version"] if doc else 0
+
+    async def iter_event_batches(self, batch_size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        cursor = self.events_collection.find({}, EVENT_PROJECTION).sort("ordinal", 1).batch_size(batch_size)
+        batch = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def insert_many(self, docs: List[Dict[str, Any]]) -> int:
+        from pymongo.errors import BulkWriteError
+        # Unordered so that duplicate ids are skipped without stopping the batch
+        try:
+            result = await self.events_collection.insert_many([dict(doc) for doc in docs], ordered=False)
+            inserted = len(result.inserted_ids)
+        except BulkWriteError as e:
+            inserted = e.details["nInserted"]
+        if inserted:
+            await self._bump_month_versions((doc['year'], doc['month']) for doc in docs)
+        return inserted
+
+    async def insert_recurrences(self, docs: List[Dict[str, Any]]) -> int:
+        from pymongo.errors import BulkWriteError
+        # Duplicate ids are rejected by the unique id index and skipped
+        try:
+            result = await self.recurrences_collection.insert_many([dict(doc) for doc in docs], ordered=False)
+            inserted = len(result.inserted_ids)
+        except BulkWriteError as e:
+            inserted = e.details["nInserted"]
+        if inserted:
+            await self._bump_recurrences_version()
+        return inserted
+
+    async def bulk_write(self, operations: List[Dict[str, Any]]) -> List[BulkResult]:
+        from pymongo import DeleteOne, InsertOne, UpdateOne
+        from pymongo.errors import BulkWriteError
+        # bulk_write only reports aggregate counts, so look up which of the
+        # targeted ids exist (and in which month) first to report not_found per operation
+        target_ids = [operation["id"] for operation in operations if operation["op"] != "create"]
+        existing = {}
+        if target_ids:
+            cursor = self.events_collection.find({"id": {"$in": target_ids}}, {"id": 1, "year": 1, "month": 1})
+            existing = {doc["id"]: (doc["year"], doc["month"]) async for doc in cursor}
+
+        requests = []
+        for operation in operations:
+            if operation["op"] == "create":
+                requests.append(InsertOne(dict(operation["doc"])))
+            elif operation["op"] == "update":
+                requests.append(UpdateOne({"id": operation["id"]}, {"$set": operation["fields"]}))
+            else:
+                requests.append(DeleteOne({"id": operation["id"]}))
+
+        errors = {}
+        try:
+            await self.events_collection.bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            errors = {error["index"]: error["errmsg"] for error in e.details["writeErrors"]}
+
+        results = []
+        changed_months = []
+        for index, operation in enumerate(operations):
+            if index in errors:
+                results.append(("error", errors[index]))
+            elif operation["op"] == "create":
+                results.append(("created", None))
+                changed_months.append((operation["doc"]["year"], operation["doc"]["month"]))
+            elif operation["id"] not in existing:
+                results.append(("not_found", None))
+            else:
+                results.append(("updated" if operation["op"] == "update" else "deleted", None))
+                changed_months.append(existing[operation["id"]])
+        await self._bump_month_versions(changed_months)
+        return results
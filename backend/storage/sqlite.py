@@ -0,0 +1,509 @@
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import sqlite3
+
+from calendar_math import DAYS_PER_MONTH, DAYS_PER_YEAR, from_ordinal, year_bounds
+from .base import BulkResult, ChangeKey, PageKey, SearchHit, StorageEngine, search_terms
+
+EVENT_COLUMNS = ("id", "year", "month", "day", "note", "type", "created_at", "updated_at", "ordinal", "changed_at")
+CURRENT_DATE_COLUMNS = ("id", "year", "month", "day", "updated_at")
+RECURRENCE_COLUMNS = (
+    "id", "year", "month", "day", "note", "type", "frequency", "interval", "until",
+    "created_at", "updated_at", "start_ordinal", "end_ordinal",
+)
+# month_versions row holding the recurrences version; no event is in year 0
+RECURRENCES_VERSION_KEY = (0, 0)
+TOMBSTONE_COLUMNS = ("id", "deleted_at")
+DATETIME_COLUMNS = ("created_at", "updated_at", "deleted_at", "changed_at")
+FETCH_BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id TEXT PRIMARY KEY,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    note TEXT NOT NULL,
+    type TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    ordinal INTEGER,
+    changed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS events_year_month_day ON events (year, month, day);
+CREATE TABLE IF NOT EXISTS custom_current_date (
+    key INTEGER PRIMARY KEY CHECK (key = 0),
+    id TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS recurrences (
+    id TEXT PRIMARY KEY,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    note TEXT NOT NULL,
+    type TEXT NOT NULL,
+    frequency TEXT NOT NULL,
+    interval INTEGER NOT NULL,
+    until TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    start_ordinal INTEGER NOT NULL,
+    end_ordinal INTEGER
+);
+CREATE INDEX IF NOT EXISTS recurrences_start_ordinal ON recurrences (start_ordinal);
+CREATE TABLE IF NOT EXISTS tombstones (
+    id TEXT NOT NULL,
+    deleted_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tombstones_deleted_at_id ON tombstones (deleted_at, id);
+CREATE TABLE IF NOT EXISTS tombstone_horizon (
+    key INTEGER PRIMARY KEY CHECK (key = 0),
+    deleted_at TEXT NOT NULL,
+    id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS month_versions (
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (year, month)
+);
+"""
+
+# calendar_math.to_ordinal() of a row's year, month and day
+ROW_ORDINAL = f"((year - 1) * {DAYS_PER_YEAR} + month * {DAYS_PER_MONTH} + (day - 1))"
+
+# Applied after SCHEMA so databases created before the column existed are upgraded
+ORDINAL_MIGRATION = f"""
+ALTER TABLE events ADD COLUMN ordinal INTEGER;
+UPDATE events SET ordinal = {ROW_ORDINAL};
+"""
+ORDINAL_INDEX = """
+CREATE INDEX IF NOT EXISTS events_ordinal_type ON events (ordinal, type);
+CREATE INDEX IF NOT EXISTS events_ordinal_created_id ON events (ordinal, created_at, id);
+"""
+
+# The change feed is keyed on changed_at, the time of the last write, which
+# unlike updated_at is never taken from an import
+CHANGED_AT_MIGRATION = """
+ALTER TABLE events ADD COLUMN changed_at TEXT;
+UPDATE events SET changed_at = updated_at;
+"""
+CHANGED_AT_INDEX = """
+DROP INDEX IF EXISTS events_updated_at_id;
+CREATE INDEX IF NOT EXISTS events_changed_at_id ON events (changed_at, id);
+"""
+
+# Full-text index over notes, kept in sync with the events table by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(note, content='events', content_rowid='rowid');
+CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events BEGIN
+    INSERT INTO events_fts (rowid, note) VALUES (new.rowid, new.note);
+END;
+CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events BEGIN
+    INSERT INTO events_fts (events_fts, rowid, note) VALUES ('delete', old.rowid, old.note);
+END;
+CREATE TRIGGER IF NOT EXISTS events_fts_update AFTER UPDATE OF note ON events BEGIN
+    INSERT INTO events_fts (events_fts, rowid, note) VALUES ('delete', old.rowid, old.note);
+    INSERT INTO events_fts (rowid, note) VALUES (new.rowid, new.note);
+END;
+"""
+
+
+def _to_row(doc: Dict[str, Any], columns) -> List[Any]:
+    return [doc[column].isoformat() if column in DATETIME_COLUMNS else doc[column] for column in columns]
+
+
+def _to_doc(row: sqlite3.Row) -> Dict[str, Any]:
+    doc = dict(row)
+    doc.pop('key', None)
+    for column in DATETIME_COLUMNS:
+        if column in doc:
+            doc[column] = datetime.fromisoformat(doc[column])
+    return doc
+
+
+class SQLiteStorageEngine(StorageEngine):
+    """Single-file storage engine for small deployments without a MongoDB server.
+
+    Queries run synchronously on one connection; they are local B-tree lookups
+    and finish well below the cost of a network round trip.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn: Optional[sqlite3.Connection] = None
+
+    async def initialize(self) -> None:
+        self.connect()
+
+    def connect(self) -> None:
+        """Open the database file and bring its schema up to date; a no-op once open."""
+        if self.conn is not None:
+            return
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        columns = [row["name"] for row in self.conn.execute("PRAGMA table_info(events)")]
+        if "ordinal" not in columns:
+            self.conn.executescript(ORDINAL_MIGRATION)
+        self.conn.executescript(ORDINAL_INDEX)
+        if "changed_at" not in columns:
+            self.conn.executescript(CHANGED_AT_MIGRATION)
+        self.conn.executescript(CHANGED_AT_INDEX)
+        has_fts = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'events_fts'"
+        ).fetchone()
+        self.conn.executescript(FTS_SCHEMA)
+        if not has_fts:
+            # Index the notes of events stored before the FTS table existed
+            with self.conn:
+                self.conn.execute("INSERT INTO events_fts (events_fts) VALUES ('rebuild')")
+
+    async def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    async def ping(self) -> None:
+        self.connect()
+        self.conn.execute("SELECT 1").fetchone()
+
+    async def diagnostics(self) -> Dict[str, Any]:
+        plans = {
+            "get_events_for_month": "SELECT * FROM events WHERE year = 1 AND month = 0 ORDER BY day",
+            "get_events_between": "SELECT * FROM events WHERE ordinal BETWEEN 0 AND 89 AND type = 'deadline' ORDER BY ordinal",
+            "get_event_by_id": "SELECT * FROM events WHERE id = ''",
+        }
+        return {
+            "engine": self.name,
+            "path": self.path,
+            "query_plans": {
+                method: [row["detail"] for row in self.conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+                for method, sql in plans.items()
+            },
+        }
+
+    async def get_current_date(self) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT * FROM custom_current_date WHERE key = 0").fetchone()
+        return _to_doc(row) if row else None
+
+    async def set_current_date(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO custom_current_date (key, id, year, month, day, updated_at) "
+                "VALUES (0, ?, ?, ?, ?, ?)",
+                _to_row(doc, CURRENT_DATE_COLUMNS),
+            )
+        return dict(doc)
+
+    async def init_current_date(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO custom_current_date (key, id, year, month, day, updated_at) "
+                "VALUES (0, ?, ?, ?, ?, ?)",
+                _to_row(doc, CURRENT_DATE_COLUMNS),
+            )
+        return await self.get_current_date()
+
+    async def advance_current_date(self, days: int, updated_at: datetime) -> Optional[Dict[str, Any]]:
+        # Every SET expression sees the old row, so the date moves in one statement
+        with self.conn:
+            row = self.conn.execute(
+                f"""
+                UPDATE custom_current_date SET
+                    year = ({ROW_ORDINAL} + ?) / {DAYS_PER_YEAR} + 1,
+                    month = ({ROW_ORDINAL} + ?) % {DAYS_PER_YEAR} / {DAYS_PER_MONTH},
+                    day = ({ROW_ORDINAL} + ?) % {DAYS_PER_MONTH} + 1,
+                    updated_at = ?
+                WHERE key = 0
+                RETURNING *
+                """,
+                (days, days, days, updated_at.isoformat()),
+            ).fetchone()
+        return _to_doc(row) if row else None
+
+    async def find_events_for_month(self, year: int, month: int) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(
+            "SELECT * FROM events WHERE year = ? AND month = ? ORDER BY day", (year, month)
+        ).fetchall()
+        return [_to_doc(row) for row in rows]
+
+    async def iter_events_between(
+        self, start_ordinal: int, end_ordinal: int, event_type: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        sql = "SELECT * FROM events WHERE ordinal BETWEEN ? AND ?"
+        params: List[Any] = [start_ordinal, end_ordinal]
+        if event_type:
+            sql += " AND type = ?"
+            params.append(event_type)
+        cursor = self.conn.execute(sql + " ORDER BY ordinal", params)
+        while True:
+            rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                yield _to_doc(row)
+
+    async def find_events_page(
+        self,
+        start_ordinal: int,
+        end_ordinal: int,
+        limit: int,
+        after: Optional[PageKey] = None,
+        event_type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        sql = "SELECT * FROM events WHERE ordinal BETWEEN ? AND ?"
+        params: List[Any] = [start_ordinal, end_ordinal]
+        if after is not None:
+            ordinal, created_at, event_id = after
+            sql += " AND (ordinal, created_at, id) > (?, ?, ?)"
+            params += [ordinal, created_at.isoformat(), event_id]
+        if event_type:
+            sql += " AND type = ?"
+            params.append(event_type)
+        rows = self.conn.execute(sql + " ORDER BY ordinal, created_at, id LIMIT ?", params + [limit]).fetchall()
+        return [_to_doc(row) for row in rows]
+
+    async def search_events(
+        self,
+        query: str,
+        limit: int,
+        offset: int = 0,
+        year: Optional[int] = None,
+        event_type: Optional[str] = None,
+    ) -> List[SearchHit]:
+        terms = search_terms(query)
+        if not terms:
+            return []
+        # Quoted terms so FTS5 query syntax in user input is matched literally
+        sql = (
+            "SELECT events.*, bm25(events_fts) AS rank FROM events_fts "
+            "JOIN events ON events.rowid = events_fts.rowid WHERE events_fts MATCH ?"
+        )
+        params: List[Any] = [" OR ".join(f'"{term}"' for term in terms)]
+        if year is not None:
+            sql += " AND events.year = ?"
+            params.append(year)
+        if event_type:
+            sql += " AND events.type = ?"
+            params.append(event_type)
+        rows = self.conn.execute(
+            sql + " ORDER BY rank, events.ordinal, events.id LIMIT ? OFFSET ?", params + [limit, offset]
+        ).fetchall()
+        # bm25() is lower for better matches
+        hits = []
+        for row in rows:
+            doc = _to_doc(row)
+            hits.append((doc, -doc.pop("rank")))
+        return hits
+
+    def _find_after(self, table: str, column: str, after: Optional[ChangeKey], limit: int) -> List[Dict[str, Any]]:
+        sql = f"SELECT * FROM {table}"
+        params: List[Any] = []
+        if after is not None:
+            sql += f" WHERE ({column}, id) > (?, ?)"
+            params += [after[0].isoformat(), after[1]]
+        rows = self.conn.execute(sql + f" ORDER BY {column}, id LIMIT ?", params + [limit]).fetchall()
+        return [_to_doc(row) for row in rows]
+
+    async def find_changed_events(self, after: Optional[ChangeKey], limit: int) -> List[Dict[str, Any]]:
+        return self._find_after("events", "changed_at", after, limit)
+
+    async def insert_tombstones(self, docs: List[Dict[str, Any]]) -> None:
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO tombstones ({', '.join(TOMBSTONE_COLUMNS)}) VALUES (?, ?)",
+                [_to_row(doc, TOMBSTONE_COLUMNS) for doc in docs],
+            )
+
+    async def find_tombstones(self, after: Optional[ChangeKey], limit: int) -> List[Dict[str, Any]]:
+        return self._find_after("tombstones", "deleted_at", after, limit)
+
+    async def prune_tombstones(self, before: datetime) -> int:
+        with self.conn:
+            newest = self.conn.execute(
+                "SELECT deleted_at, id FROM tombstones WHERE deleted_at < ? ORDER BY deleted_at DESC, id DESC LIMIT 1",
+                (before.isoformat(),),
+            ).fetchone()
+            if newest is None:
+                return 0
+            # The horizon only moves forward
+            self.conn.execute(
+                "INSERT INTO tombstone_horizon (key, deleted_at, id) VALUES (0, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET deleted_at = excluded.deleted_at, id = excluded.id "
+                "WHERE (excluded.deleted_at, excluded.id) > (deleted_at, id)",
+                (newest["deleted_at"], newest["id"]),
+            )
+            return self.conn.execute("DELETE FROM tombstones WHERE deleted_at < ?", (before.isoformat(),)).rowcount
+
+    async def get_tombstone_horizon(self) -> Optional[ChangeKey]:
+        row = self.conn.execute("SELECT deleted_at, id FROM tombstone_horizon WHERE key = 0").fetchone()
+        return (datetime.fromisoformat(row["deleted_at"]), row["id"]) if row else None
+
+    async def find_recurrences(
+        self, start_ordinal: Optional[int] = None, end_ordinal: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        sql = "SELECT * FROM recurrences WHERE 1 = 1"
+        params: List[Any] = []
+        if end_ordinal is not None:
+            sql += " AND start_ordinal <= ?"
+            params.append(end_ordinal)
+        if start_ordinal is not None:
+            sql += " AND (end_ordinal IS NULL OR end_ordinal >= ?)"
+            params.append(start_ordinal)
+        return [_to_doc(row) for row in self.conn.execute(sql, params)]
+
+    async def find_recurrence(self, rule_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT * FROM recurrences WHERE id = ?", (rule_id,)).fetchone()
+        return _to_doc(row) if row else None
+
+    async def insert_recurrence(self, doc: Dict[str, Any]) -> None:
+        with self.conn:
+            self.conn.execute(
+                f"INSERT INTO recurrences ({', '.join(RECURRENCE_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(RECURRENCE_COLUMNS))})",
+                _to_row(doc, RECURRENCE_COLUMNS),
+            )
+            self._bump_month_version(*RECURRENCES_VERSION_KEY)
+
+    async def delete_recurrence(self, rule_id: str) -> bool:
+        with self.conn:
+            deleted = self.conn.execute("DELETE FROM recurrences WHERE id = ?", (rule_id,)).rowcount
+            if deleted:
+                self._bump_month_version(*RECURRENCES_VERSION_KEY)
+        return bool(deleted)
+
+    async def get_recurrences_version(self) -> int:
+        return await self.get_month_version(*RECURRENCES_VERSION_KEY)
+
+    async def iter_event_batches(self, batch_size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        cursor = self.conn.execute("SELECT * FROM events ORDER BY ordinal")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [_to_doc(row) for row in rows]
+
+    async def find_event(self, event_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT * FROM events WHERE id = ?", (event_id,)).fetchone()
+        return _to_doc(row) if row else None
+
+    # Statement helpers; callers decide the transaction boundary
+    def _bump_month_version(self, year: int, month: int) -> None:
+        self.conn.execute(
+            "INSERT INTO month_versions (year, month, version) VALUES (?, ?, 1) "
+            "ON CONFLICT (year, month) DO UPDATE SET version = version + 1",
+            (year, month),
+        )
+
+    def _insert(self, doc: Dict[str, Any]) -> None:
+        self.conn.execute(
+            f"INSERT INTO events ({', '.join(EVENT_COLUMNS)}) VALUES ({', '.join('?' * len(EVENT_COLUMNS))})",
+            _to_row(doc, EVENT_COLUMNS),
+        )
+        self._bump_month_version(doc['year'], doc['month'])
+
+    def _update(self, event_id: str, fields: Dict[str, Any]) -> bool:
+        columns = [column for column in fields if column in EVENT_COLUMNS and column != "id"]
+        if not columns:
+            return self.conn.execute("SELECT 1 FROM events WHERE id = ?", (event_id,)).fetchone() is not None
+        row = self.conn.execute(
+            f"UPDATE events SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ? "
+            "RETURNING year, month",
+            _to_row(fields, columns) + [event_id],
+        ).fetchone()
+        if row is None:
+            return False
+        self._bump_month_version(row["year"], row["month"])
+        return True
+
+    def _delete(self, event_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("DELETE FROM events WHERE id = ? RETURNING year, month", (event_id,)).fetchone()
+        if row is None:
+            return None
+        self._bump_month_version(row["year"], row["month"])
+        return dict(row)
+
+    async def count_events_by_day(self, year: int) -> Dict[Tuple[int, int], int]:
+        rows = self.conn.execute(
+            "SELECT ordinal, COUNT(*) AS count FROM events WHERE ordinal BETWEEN ? AND ? GROUP BY ordinal",
+            year_bounds(year),
+        )
+        return {from_ordinal(row["ordinal"])[1:]: row["count"] for row in rows}
+
+    async def count_events_by_type(self, year: int) -> Dict[Tuple[int, int, str], int]:
+        rows = self.conn.execute(
+            "SELECT ordinal, type, COUNT(*) AS count FROM events WHERE ordinal BETWEEN ? AND ? "
+            "GROUP BY ordinal, type",
+            year_bounds(year),
+        )
+        return {from_ordinal(row["ordinal"])[1:] + (row["type"],): row["count"] for row in rows}
+
+    async def get_month_version(self, year: int, month: int) -> int:
+        row = self.conn.execute(
+            "SELECT version FROM month_versions WHERE year = ? AND month = ?", (year, month)
+        ).fetchone()
+        return row["version"] if row else 0
+
+    async def insert_event(self, doc: Dict[str, Any]) -> None:
+        with self.conn:
+            self._insert(doc)
+
+    async def update_event(self, event_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self.conn:
+            found = self._update(event_id, fields)
+        return await self.find_event(event_id) if found else None
+
+    async def delete_event(self, event_id: str) -> Optional[Dict[str, Any]]:
+        with self.conn:
+            return self._delete(event_id)
+
+    async def insert_many(self, docs: List[Dict[str, Any]]) -> int:
+        with self.conn:
+            # rowcount sums sqlite3_changes() per row, which unlike
+            # total_changes leaves out the writes of the FTS triggers
+            inserted = self.conn.executemany(
+                f"INSERT OR IGNORE INTO events ({', '.join(EVENT_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(EVENT_COLUMNS))})",
+                [_to_row(doc, EVENT_COLUMNS) for doc in docs],
+            ).rowcount
+            if inserted:
+                for year, month in {(doc['year'], doc['month']) for doc in docs}:
+                    self._bump_month_version(year, month)
+            return inserted
+
+    async def insert_recurrences(self, docs: List[Dict[str, Any]]) -> int:
+        with self.conn:
+            inserted = self.conn.executemany(
+                f"INSERT OR IGNORE INTO recurrences ({', '.join(RECURRENCE_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(RECURRENCE_COLUMNS))})",
+                [_to_row(doc, RECURRENCE_COLUMNS) for doc in docs],
+            ).rowcount
+            if inserted:
+                self._bump_month_version(*RECURRENCES_VERSION_KEY)
+            return inserted
+
+    async def bulk_write(self, operations: List[Dict[str, Any]]) -> List[BulkResult]:
+        # One transaction for the whole batch instead of a commit per statement
+        results = []
+        with self.conn:
+            for operation in operations:
+                try:
+                    if operation["op"] == "create":
+                        self._insert(operation["doc"])
+                        results.append(("created", None))
+                    elif operation["op"] == "update":
+                        found = self._update(operation["id"], operation["fields"])
+                        results.append(("updated" if found else "not_found", None))
+                    else:
+                        found = self._delete(operation["id"]) is not None
+                        results.append(("deleted" if found else "not_found", None))
+                except sqlite3.Error as e:
+                    results.append(("error", str(e)))
+        return results
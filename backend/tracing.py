@@ -0,0 +1,142 @@
+"""Per-request correlation IDs, lightweight tracing spans and the slow-operation log.
+
+Every HTTP request gets an ID, taken from its X-Request-ID header or
+generated, which is echoed in the response and added to every log line
+written while handling it. Spans time a request, a CalendarService method or
+a storage call. A span slower than the slow-operation threshold is always
+logged with its arguments (the query filter, for storage calls), the number
+of documents it returned and its elapsed time; every span of a sampled
+request is logged too. Spans of other requests only read the clock, so the
+cost at high request rates is the sampling rate's share of log lines.
+"""
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+import logging
+import random
+import re
+import time
+import uuid
+
+logger = logging.getLogger("tracing")
+
+REQUEST_ID_HEADER = b"x-request-id"
+# Incoming IDs are reused only if they are short and safe to log
+VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,64}$")
+# Longest argument text written to a span's log line
+MAX_ARGUMENTS_LENGTH = 300
+
+_request_id: ContextVar[str] = ContextVar("request_id", default="-")
+_sampled: ContextVar[bool] = ContextVar("trace_sampled", default=False)
+
+slow_operation_seconds = 0.1
+sample_rate = 0.01
+
+
+def configure(slow_operation_ms: float, sampling: float) -> None:
+    """Set the slow-operation threshold and the share of requests traced in full."""
+    global slow_operation_seconds, sample_rate
+    slow_operation_seconds = slow_operation_ms / 1000
+    sample_rate = sampling
+
+
+def count_documents(result: Any) -> Optional[int]:
+    """Documents in a storage or service result, or None if it is not a document result."""
+    if result is None:
+        return 0
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    if isinstance(result, dict) or hasattr(result, "dict"):
+        return 1
+    return None
+
+
+def _format_arguments(args: Tuple, kwargs: Dict[str, Any]) -> str:
+    text = ", ".join([repr(arg) for arg in args] + [f"{name}={value!r}" for name, value in kwargs.items()])
+    if len(text) > MAX_ARGUMENTS_LENGTH:
+        return text[:MAX_ARGUMENTS_LENGTH] + "..."
+    return text
+
+
+class Span:
+    """Times one operation; logs it on exit if it was slow or its request is sampled.
+
+    Arguments are formatted only when the span is logged. Set ``documents``
+    before exit to report how many documents the operation returned.
+    """
+
+    __slots__ = ("name", "args", "kwargs", "documents", "start", "long_lived")
+
+    def __init__(self, name: str, args: Tuple = (), kwargs: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.documents: Optional[int] = None
+        self.start = 0.0
+        # Set for operations expected to outlast the threshold, such as event streams
+        self.long_lived = False
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        elapsed = time.perf_counter() - self.start
+        slow = elapsed >= slow_operation_seconds and not self.long_lived
+        if slow or _sampled.get():
+            message = f"{'Slow ' if slow else ''}{self.name} took {elapsed * 1000:.1f} ms"
+            if self.args or self.kwargs:
+                message += f" filter=({_format_arguments(self.args, self.kwargs)})"
+            if self.documents is not None:
+                message += f" documents={self.documents}"
+            if exc_type is not None:
+                message += f" error={exc_type.__name__}: {exc}"
+            logger.log(logging.WARNING if slow else logging.INFO, message)
+        return False
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds the current request's ID to log records as ``request_id``."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class RequestIdMiddleware:
+    """ASGI middleware assigning each request its correlation ID and sampling decision.
+
+    The ID is returned in the X-Request-ID response header, and the whole
+    request is traced as one span.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = dict(scope["headers"]).get(REQUEST_ID_HEADER, b"").decode("latin-1")
+        if not VALID_REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+
+        span = Span(f"{scope['method']} {scope['path']}")
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                span.long_lived = any(
+                    name == b"content-type" and value.startswith(b"text/event-stream") for name, value in headers
+                )
+                message["headers"] = [*headers, (REQUEST_ID_HEADER, request_id.encode())]
+            await send(message)
+
+        id_token = _request_id.set(request_id)
+        sampled_token = _sampled.set(sample_rate > 0 and random.random() < sample_rate)
+        try:
+            with span:
+                await self.app(scope, receive, send_with_id)
+        finally:
+            _sampled.reset(sampled_token)
+            _request_id.reset(id_token)
@@ -1,4 +1,4 @@
-import React, { useState, useMemo, useEffect, useCallback } from 'react';
+import React, { useState, useMemo, useEffect, useCallback, useRef } from 'react';
 import { Card, CardContent, CardHeader, CardTitle } from './ui/card';
 import { Button } from './ui/button';
 import { Badge } from './ui/badge';
@@ -9,7 +9,7 @@ import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '.
 import { Textarea } from './ui/textarea';
 import { ChevronLeft, ChevronRight, Calendar, Settings, Plus, Edit, Trash2, Loader2 } from 'lucide-react';
 import { useToast } from '../hooks/use-toast';
-import { calendarApi, eventsApi, handleApiError } from '../services/api';
+import { calendarApi, eventsApi, handleApiError, subscribeToChanges } from '../services/api';
 
 // Constants moved inline to reduce bundle size
 const CUSTOM_DAYS = [
@@ -61,6 +61,12 @@ const CustomCalendar = () => {
     loadEventsForMonth(currentYear, currentMonth);
   }, [currentMonth, currentYear]);
 
+  // Month on screen, read by the change feed without resubscribing
+  const viewRef = useRef({ year: currentYear, month: currentMonth });
+  useEffect(() => {
+    viewRef.current = { year: currentYear, month: currentMonth };
+  }, [currentMonth, currentYear]);
+
   // Optimized data loading with useCallback
   const loadInitialData = useCallback(async () => {
     try {
@@ -105,6 +111,25 @@ const CustomCalendar = () => {
     }
   }, [toast]);
 
+  // Apply changes made in other sessions as they happen instead of refetching
+  useEffect(() => {
+    return subscribeToChanges((type, data) => {
+      if (type === 'current_date.updated') {
+        setCustomCurrentDate(data);
+        return;
+      }
+      const { year, month } = viewRef.current;
+      // Event changes that name their month only matter when it is on screen.
+      // A rule's year and month are only where it starts, and its occurrences
+      // can fall in any later month, so every recurrence change reloads.
+      const isEventChange = type.startsWith('event.');
+      if (isEventChange && data.year !== undefined && (data.year !== year || data.month !== month)) {
+        return;
+      }
+      loadEventsForMonth(year, month);
+    });
+  }, [loadEventsForMonth]);
+
   // Generate calendar grid for current month
   const calendarDays = useMemo(() => {
     const days = [];
@@ -54,11 +54,25 @@ export const calendarApi = {
   },
 };
 
+// Month event lists keyed by "year/month", revalidated with their ETag
+const monthCache = new Map();
+
 // Events API - optimized with better error handling
 export const eventsApi = {
   getEventsForMonth: async (year, month) => {
+    const key = `${year}/${month}`;
+    const cached = monthCache.get(key);
     try {
-      const response = await apiClient.get(`/events/${year}/${month}`);
+      const response = await apiClient.get(`/events/${year}/${month}`, {
+        headers: cached ? { 'If-None-Match': cached.etag } : {},
+        validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+      });
+      if (response.status === 304 && cached) {
+        return cached.data;
+      }
+      if (response.headers.etag) {
+        monthCache.set(key, { etag: response.headers.etag, data: response.data });
+      }
       return response.data;
     } catch (error) {
       console.error(`Failed to get events for ${year}/${month}:`, error);
@@ -66,6 +80,22 @@ export const eventsApi = {
     }
   },
 
+  // Fetch every event between two {year, month, day} dates in one request
+  getEventsInRange: async (from, to) => {
+    try {
+      const response = await apiClient.get('/events/range', {
+        params: {
+          from: `${from.year}-${from.month}-${from.day}`,
+          to: `${to.year}-${to.month}-${to.day}`,
+        },
+      });
+      return response.data;
+    } catch (error) {
+      console.error('Failed to get events for range:', error);
+      return [];
+    }
+  },
+
   createEvent: async (eventData) => {
     const response = await apiClient.post('/events', eventData);
     return response.data;
@@ -82,6 +112,29 @@ export const eventsApi = {
   },
 };
 
+// Change notifications pushed by the server over Server-Sent Events
+const CHANGE_TYPES = [
+  'current_date.updated',
+  'event.created',
+  'event.updated',
+  'event.deleted',
+  'events.imported',
+  'recurrences.imported',
+  'recurrence.created',
+  'recurrence.deleted',
+  'dropped',
+];
+
+// Calls onChange(type, data) for every change; returns an unsubscribe function.
+// The browser reconnects by itself when the stream ends (e.g. after 'dropped').
+export const subscribeToChanges = (onChange) => {
+  const source = new EventSource(`${API}/stream`);
+  CHANGE_TYPES.forEach((type) => {
+    source.addEventListener(type, (message) => onChange(type, JSON.parse(message.data)));
+  });
+  return () => source.close();
+};
+
 // Simplified error handling
 export const handleApiError = (error) => {
   if (error.response?.data?.detail) {
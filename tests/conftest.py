@@ -0,0 +1,44 @@
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from services import CalendarService  # noqa: E402
+from storage import MemoryStorageEngine, MongoStorageEngine, SQLiteStorageEngine  # noqa: E402
+
+ENGINES = ["memory", "sqlite", "mongo"]
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(params=ENGINES)
+async def engine(request, tmp_path, monkeypatch):
+    """An initialized, empty storage engine of each kind.
+
+    The mongo engine runs against mongomock-motor, an in-process fake of
+    Motor, since the suite cannot assume a MongoDB server.
+    """
+    if request.param == "memory":
+        engine = MemoryStorageEngine()
+    elif request.param == "sqlite":
+        engine = SQLiteStorageEngine(str(tmp_path / "calendar.db"))
+    else:
+        mongomock_motor = pytest.importorskip("mongomock_motor")
+        import motor.motor_asyncio
+        monkeypatch.setattr(motor.motor_asyncio, "AsyncIOMotorClient", mongomock_motor.AsyncMongoMockClient)
+        engine = MongoStorageEngine("mongodb://localhost", f"calendar_{uuid.uuid4().hex}")
+    await engine.initialize()
+    yield engine
+    await engine.close()
+
+
+@pytest.fixture
+def service(engine):
+    return CalendarService(engine)
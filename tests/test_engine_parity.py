@@ -0,0 +1,244 @@
+"""The same CalendarService behaviour on every storage engine."""
+import httpx
+import orjson
+import pytest
+
+import server
+from models import BulkEventOperation, EventCreate, EventUpdate, RecurrenceCreate
+from services import ChangeTokenExpired
+
+pytestmark = pytest.mark.anyio
+
+
+async def create(service, day, note, year=12, month=3, **fields):
+    return await service.create_event(EventCreate(year=year, month=month, day=day, note=note, **fields))
+
+
+async def lines(*docs):
+    for doc in docs:
+        yield doc if isinstance(doc, str) else orjson.dumps(doc).decode()
+
+
+@pytest.fixture
+async def api(engine, service, monkeypatch):
+    """HTTP client for the app, serving from the test's engine and service."""
+    monkeypatch.setattr(server, "storage", engine)
+    server.app.dependency_overrides[server.get_calendar_service] = lambda: service
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    server.app.dependency_overrides.clear()
+
+
+async def test_month_read_etag_and_304(api, service):
+    harvest = await create(service, 5, "Harvest")
+
+    response = await api.get("/api/events/12/3")
+    assert response.status_code == 200
+    assert [event["id"] for event in response.json()] == [harvest.id]
+    etag = response.headers["etag"]
+
+    assert (await api.get("/api/events/12/3", headers={"If-None-Match": etag})).status_code == 304
+
+    await create(service, 1, "Sowing")
+    response = await api.get("/api/events/12/3", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [event["note"] for event in response.json()] == ["Sowing", "Harvest"]
+    assert response.headers["etag"] != etag
+
+
+async def test_cached_month_reflects_updates_and_deletes(service):
+    event = await create(service, 5, "Harvest")
+    assert [e.note for e in await service.get_events_for_month(12, 3)] == ["Harvest"]
+
+    await service.update_event(event.id, EventUpdate(note="Late harvest"))
+    assert [e.note for e in await service.get_events_for_month(12, 3)] == ["Late harvest"]
+
+    assert await service.delete_event(event.id)
+    assert await service.get_events_for_month(12, 3) == []
+
+
+async def test_keyset_pages_cover_the_month_once_in_order(service):
+    for day, note in [(9, "a"), (2, "b"), (2, "c"), (30, "d"), (1, "e"), (9, "f"), (15, "g")]:
+        await create(service, day, note)
+    # Pages are ordered by (ordinal, created_at, id); MongoDB keeps
+    # milliseconds only, so events created together may tie on created_at
+    month = await service.get_events_for_month(12, 3)
+    expected = [event.id for event in sorted(month, key=lambda event: (event.day, event.created_at, event.id))]
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        events, cursor = await service.get_events_page((12, 3, 1), (12, 3, 30), 3, cursor)
+        seen.extend(event.id for event in events)
+        pages += 1
+        if cursor is None:
+            break
+
+    assert seen == expected
+    assert pages == 3
+
+
+async def test_bulk_results_per_operation(service):
+    existing = await create(service, 3, "Existing")
+    doomed = await create(service, 4, "Doomed")
+
+    response = await service.bulk_events([
+        BulkEventOperation(op="create", data={"year": 12, "month": 3, "day": 7, "note": "New"}),
+        BulkEventOperation(op="update", id=existing.id, data={"note": "Renamed"}),
+        BulkEventOperation(op="update", id="missing", data={"note": "Nobody"}),
+        BulkEventOperation(op="delete", id=doomed.id),
+        BulkEventOperation(op="delete", id="missing too"),
+        BulkEventOperation(op="create", data={"year": 12, "month": 11, "day": 7, "note": "Bad month"}),
+        BulkEventOperation(op="delete", id=doomed.id),
+        BulkEventOperation(op="delete", id=existing.id),
+    ])
+
+    assert [result.status for result in response.results] == [
+        "created", "updated", "not_found", "deleted", "not_found", "error", "error", "error"
+    ]
+    assert response.results[6].error == "id is already targeted by operation 3"
+    assert (response.created, response.updated, response.deleted, response.failed) == (1, 1, 1, 5)
+    assert sorted(e.note for e in await service.get_events_for_month(12, 3)) == ["New", "Renamed"]
+    changes = await service.get_changes(None, 10)
+    assert [tombstone.id for tombstone in changes.deleted] == [doomed.id]
+
+
+async def test_change_tokens(service):
+    first = await create(service, 1, "First")
+    second = await create(service, 2, "Second")
+
+    # Both may share a timestamp at MongoDB's millisecond precision, so
+    # their order is not asserted
+    changes = await service.get_changes(None, 1)
+    assert len(changes.events) == 1 and changes.has_more
+    seen = [changes.events[0].id]
+    changes = await service.get_changes(changes.next_token, 10)
+    seen += [event.id for event in changes.events]
+    assert sorted(seen) == sorted([first.id, second.id])
+    assert not changes.has_more
+    token = changes.next_token
+
+    await service.update_event(first.id, EventUpdate(note="First, edited"))
+    await service.delete_event(second.id)
+    changes = await service.get_changes(token, 10)
+    assert [event.note for event in changes.events] == ["First, edited"]
+    assert [tombstone.id for tombstone in changes.deleted] == [second.id]
+
+    # Nothing new after the last token
+    token = changes.next_token
+    changes = await service.get_changes(token, 10)
+    assert changes.events == [] and not changes.recurrences_changed
+
+    # Imported events keep an old updated_at but are listed by import time
+    await service.import_events(lines(
+        {"id": "old", "year": 12, "month": 3, "day": 9, "note": "Old", "updated_at": "2000-01-01T00:00:00"},
+    ))
+    changes = await service.get_changes(token, 10)
+    assert [event.id for event in changes.events] == ["old"]
+    assert changes.events[0].updated_at.year == 2000
+    token = changes.next_token
+
+    # Rule changes are flagged once
+    await service.create_recurrence(RecurrenceCreate(year=12, month=3, day=1, note="Rule", frequency="weekly"))
+    changes = await service.get_changes(token, 10)
+    assert changes.events == [] and changes.recurrences_changed
+    assert not (await service.get_changes(changes.next_token, 10)).recurrences_changed
+
+
+async def test_bulk_writes_appear_in_change_feed(service):
+    existing = await create(service, 3, "Existing")
+    token = (await service.get_changes(None, 10)).next_token
+    await service.bulk_events([
+        BulkEventOperation(op="create", data={"year": 12, "month": 3, "day": 7, "note": "New"}),
+        BulkEventOperation(op="update", id=existing.id, data={"note": "Renamed"}),
+    ])
+    changes = await service.get_changes(token, 10)
+    assert sorted(event.note for event in changes.events) == ["New", "Renamed"]
+
+
+async def test_change_token_expires_only_after_pruning(engine, service):
+    gone = await create(service, 1, "Gone")
+    later = await create(service, 2, "Later")
+    token = (await service.get_changes(None, 10)).next_token
+    await service.delete_event(gone.id)
+    assert [t.id for t in (await service.get_changes(token, 10)).deleted] == [gone.id]
+
+    # With a retention in the past the next deletion prunes every tombstone,
+    # including the one after the token
+    service.tombstone_retention = -service.tombstone_retention
+    await service.delete_event(later.id)
+    assert await engine.get_tombstone_horizon() is not None
+    with pytest.raises(ChangeTokenExpired):
+        await service.get_changes(token, 10)
+
+
+async def test_recurrence_expansion(service):
+    rule = await service.create_recurrence(RecurrenceCreate(
+        year=12, month=3, day=1, note="Market", frequency="weekly", until="12-4-15"
+    ))
+    single = await create(service, 12, "Fair")
+
+    month = await service.get_events_for_month(12, 3)
+    assert [(event.day, event.note) for event in month] == [(1, "Market"), (11, "Market"), (12, "Fair"), (21, "Market")]
+    assert {event.recurrence_id for event in month} == {rule.id, None}
+
+    ranged = [event async for event in service.iter_events_in_range((12, 4, 1), (12, 5, 30))]
+    assert [(event.month, event.day) for event in ranged] == [(4, 1), (4, 11)]
+    assert single.id not in {event.id for event in ranged}
+
+    await service.delete_recurrence(rule.id)
+    assert [event.note for event in await service.get_events_for_month(12, 3)] == ["Fair"]
+
+
+async def test_import_counts(service):
+    existing = await create(service, 4, "Existing")
+    result = await service.import_events(lines(
+        {"year": 12, "month": 3, "day": 2, "note": "Imported"},
+        {"kind": "event", "id": "imported-2", "year": 12, "month": 3, "day": 3, "note": "Imported too"},
+        {"id": existing.id, "year": 12, "month": 3, "day": 1, "note": "Duplicate"},
+        {"year": 12, "month": 10, "day": 1, "note": "Bad month"},
+        "not json",
+        "",
+        {"kind": "recurrence", "id": "rule-1", "year": 12, "month": 0, "day": 1, "note": "Tithe",
+         "frequency": "monthly"},
+    ), batch_size=2)
+
+    assert (result.inserted, result.skipped, result.invalid) == (2, 1, 2)
+    assert (result.recurrences_inserted, result.recurrences_skipped) == (1, 0)
+    assert [e.note for e in await service.get_events_for_month(12, 3)] == ["Tithe", "Imported", "Imported too", "Existing"]
+
+    again = await service.import_events(lines(
+        {"kind": "event", "id": "imported-2", "year": 12, "month": 3, "day": 3, "note": "Imported too"},
+        {"kind": "recurrence", "id": "rule-1", "year": 12, "month": 0, "day": 1, "note": "Tithe",
+         "frequency": "monthly"},
+    ))
+    assert (again.inserted, again.skipped, again.recurrences_inserted, again.recurrences_skipped) == (0, 1, 0, 1)
+
+
+async def test_import_timezone_aware_timestamps(service):
+    await create(service, 2, "Local")
+    result = await service.import_events(lines(
+        {"id": "utc", "year": 12, "month": 3, "day": 1, "note": "UTC",
+         "created_at": "2025-01-01T00:00:00Z", "updated_at": "2025-01-01T00:00:00Z"},
+        {"id": "offset", "year": 12, "month": 3, "day": 1, "note": "Offset",
+         "created_at": "2025-01-01T03:00:00+02:00", "updated_at": "2025-01-01T03:00:00+02:00"},
+        {"kind": "recurrence", "id": "rule-z", "year": 12, "month": 3, "day": 1, "note": "Rule",
+         "frequency": "monthly", "created_at": "2025-01-02T00:00:00Z", "updated_at": "2025-01-02T00:00:00Z"},
+    ))
+    assert (result.inserted, result.recurrences_inserted, result.invalid) == (2, 1, 0)
+
+    # Stored as naive UTC, so they order against locally created events
+    events, _ = await service.get_events_page((12, 3, 1), (12, 3, 30), 10)
+    assert [event.note for event in events] == ["UTC", "Offset", "Rule", "Local"]
+    assert all(event.created_at.tzinfo is None for event in events)
+    assert len((await service.get_changes(None, 10)).events) == 3
+
+
+async def test_export_round_trip(engine, service):
+    await create(service, 4, "Exported")
+    await service.create_recurrence(RecurrenceCreate(year=12, month=3, day=2, note="Weekly", frequency="weekly"))
+    exported = "".join([chunk async for chunk in service.export_events()])
+    assert [orjson.loads(line)["kind"] for line in exported.splitlines()] == ["event", "recurrence"]
+
+    result = await service.import_events(lines(*exported.splitlines()))
+    assert (result.inserted, result.skipped, result.recurrences_skipped, result.invalid) == (0, 1, 1, 0)
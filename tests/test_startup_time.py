@@ -0,0 +1,28 @@
+"""Cold-start budget: backend/benchmarks/startup_time.py --check, run from the test suite."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+LAZY_MODULES = ["numpy", "pandas", "boto3", "motor", "pymongo"]
+
+
+def test_startup_time_within_budget():
+    result = subprocess.run(
+        [sys.executable, "benchmarks/startup_time.py", "--check", "--runs", "3"],
+        capture_output=True, text=True, cwd=BACKEND_DIR,
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_import_server_with_mongo_engine_loads_no_driver():
+    # The default engine: building it must not import Motor or PyMongo
+    code = f"import sys, server; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True, text=True, cwd=BACKEND_DIR,
+        env={**os.environ, "STORAGE_ENGINE": "mongo"}, check=True,
+    )
+    assert result.stdout.strip() == ""